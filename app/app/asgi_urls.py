@@ -0,0 +1,13 @@
+"""app URL Configuration of the ASGI application
+
+The routes of `app.urls`, with the rockband reads served by async views.
+"""
+from django.urls import path, include
+
+from app.urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path('api/rockband/', include('rockband.asgi_urls'))
+    if getattr(pattern, 'namespace', None) == 'rockband' else pattern
+    for pattern in wsgi_urlpatterns
+]
@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +58,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'app.urls'
 
+# Routes of the ASGI application, serving the rockband reads async
+ASGI_URLCONF = 'app.asgi_urls'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -78,15 +83,102 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# core.db.backends.postgresql adds CONN_HEALTH_CHECKS and an in-process
+# connection pool, enabled when DB_POOL_SIZE is positive. Keep
+# DB_CONN_MAX_AGE=0, the default, with the pool so connections go back to
+# it after each request; without the pool a positive value keeps
+# connections open across requests.
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS':
+            os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'SIZE': int(os.environ.get('DB_POOL_SIZE', 0)),
+            'MAX_OVERFLOW': int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# The local memory cache is private to each process. Serving with more
+# than one worker needs a shared CACHE_BACKEND, such as memcached.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
+if CACHES['default']['BACKEND'].endswith('.LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+    }
+
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Readiness probe results are cached in each process so frequent probes
+# stay cheap.
+
+HEALTH_CACHE_TIMEOUT = int(os.environ.get('HEALTH_CACHE_TIMEOUT', 5))
+HEALTH_CHECK_TIMEOUT = float(os.environ.get('HEALTH_CHECK_TIMEOUT', 2))
+
+# Send per-request db, serializer and render timings to clients in a
+# Server-Timing header. Aggregates are always served at /metrics, to
+# admins and to scrapers sending METRICS_TOKEN as a bearer token.
+
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1') == '1'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Directory serve workers add up their metrics through, temporary if empty
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+
+# Check requests against the query budgets of their views: 'warn' logs
+# requests over budget, 'raise' fails them, 'off' disables the check.
+
+QUERY_BUDGET = os.environ.get('QUERY_BUDGET', 'warn' if DEBUG else 'off')
+
+
+# Background tasks
+# Band images are processed in a bounded in-process worker pool when
+# BAND_IMAGE_ASYNC is on, the default, and uploads answer 202 right away.
+# TASKS_EAGER runs tasks inline instead. With BAND_IMAGE_ASYNC off, or the
+# queue full, an upload request renders every size and format variant, up
+# to nine encodes including AVIF, before it answers. Tasks lost to a crash
+# leave bands pending or processing until the process_stale_images command
+# processes them again.
+
+BAND_IMAGE_ASYNC = os.environ.get('BAND_IMAGE_ASYNC', '1') == '1'
+TASKS_EAGER = os.environ.get('TASKS_EAGER', '0') == '1'
+TASK_WORKERS = int(os.environ.get('TASK_WORKERS', 2))
+TASK_QUEUE_SIZE = int(os.environ.get('TASK_QUEUE_SIZE', 100))
+
+
+# File uploads
+# https://docs.djangoproject.com/en/3.2/topics/http/file-uploads/
+
+FILE_UPLOAD_HANDLERS = [
+    'core.uploadhandler.BoundedTemporaryFileUploadHandler',
+]
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 20 * 1024 * 1024))
+BAND_IMAGE_MAX_PIXELS = int(os.environ.get('BAND_IMAGE_MAX_PIXELS', 40000000))
+# 'content' stores band images once per distinct content, 'uuid' per upload
+BAND_IMAGE_STORAGE = os.environ.get('BAND_IMAGE_STORAGE', 'uuid')
 
 
 # Password validation
@@ -132,6 +224,15 @@ MEDIA_ROOT = '/vol/web/media'
 
 STATIC_ROOT = '/vol/web/static'
 
+# Media is served by core.views.serve_media. Set MEDIA_SENDFILE to
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) to let the
+# front web server send the file body.
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/'
+)
+MEDIA_MAX_AGE = int(os.environ.get('MEDIA_MAX_AGE', 3600))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import checks, signals  # noqa: F401
+        from core.db.pool import pool_metrics
+        from core.metrics import registry
+
+        registry.register_collector(pool_metrics)
@@ -0,0 +1,67 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+def token_cache():
+    """Return the cache that holds resolved auth tokens"""
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def token_cache_key(key):
+    """
+    Return the cache key for a token key
+    :param key: token key
+    :return: str
+    """
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'auth-token:{digest}'
+
+
+def invalidate_token(key):
+    """
+    Drop a token from the cache
+    :param key: token key
+    :return: None
+    """
+    token_cache().delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token to user resolution.
+
+    Cache entries expire after AUTH_TOKEN_CACHE_TIMEOUT seconds and are
+    dropped by core.signals when the token is deleted or its user is saved.
+    Deployments running several processes need AUTH_TOKEN_CACHE_ALIAS to be
+    a shared cache, which the core.E001 deploy check enforces; a process
+    local cache would keep accepting the token in the other processes.
+    """
+
+    def authenticate_credentials(self, key):
+        """
+        Return the user and token for a key, from the cache when possible
+        :param key: token key
+        :return: (user, token)
+        """
+        cache = token_cache()
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return (token.user, token)
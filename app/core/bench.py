@@ -0,0 +1,76 @@
+import statistics
+import timeit
+from importlib import import_module
+
+from django.apps import apps
+
+
+def discover(module='benchmarks'):
+    """
+    Import the benchmarks module of every installed app.
+    A benchmarks module defines `prepare(size)`, which seeds `size` rows and
+    returns a context, and `CASES`, a dict mapping case names to a function
+    of that context returning the callable to time.
+    :param module: module name looked up in each app
+    :return: dict of app label to module
+    """
+    found = {}
+    for app_config in apps.get_app_configs():
+        try:
+            found[app_config.label] = import_module(
+                f'{app_config.name}.{module}'
+            )
+        except ModuleNotFoundError as exc:
+            if exc.name != f'{app_config.name}.{module}':
+                raise
+
+    return found
+
+
+def time_case(func, repeat=5):
+    """
+    Time a callable the way timeit does.
+    The number of calls per run is picked so a run lasts at least 0.2s,
+    which keeps fast cases above the timer resolution; the statistics are
+    per call.
+    :param func: callable without arguments
+    :param repeat: number of runs
+    :return: dict with 'loops', 'min_ms', 'median_ms' and 'mean_ms'
+    """
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    runs = [elapsed / loops * 1000 for elapsed in timer.repeat(repeat, loops)]
+
+    return {
+        'loops': loops,
+        'min_ms': round(min(runs), 4),
+        'median_ms': round(statistics.median(runs), 4),
+        'mean_ms': round(statistics.mean(runs), 4),
+    }
+
+
+def compare(results, baseline, threshold=0.2, metric='median_ms'):
+    """
+    Compare benchmark results against a baseline.
+    A case regresses when its metric is more than `threshold` (a fraction,
+    0.2 for 20%) above the baseline; cases missing from the baseline are
+    skipped.
+    :param results: list of result dicts with 'name' and 'size'
+    :param baseline: list of result dicts of an earlier run
+    :param threshold: allowed slowdown
+    :param metric: result key compared
+    :return: list of (name, size, baseline value, value, ratio) regressions
+    """
+    previous = {(row['name'], row['size']): row[metric] for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row['name'], row['size']))
+        if not before:
+            continue
+        ratio = row[metric] / before
+        if ratio > 1 + threshold:
+            regressions.append(
+                (row['name'], row['size'], before, row[metric], ratio)
+            )
+
+    return regressions
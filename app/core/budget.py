@@ -0,0 +1,58 @@
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request runs more queries than its view allows"""
+
+
+def query_budget(queries):
+    """
+    Set the query budget of a view method or viewset action
+    :param queries: maximum number of queries a request may run
+    :return: decorator
+    """
+    def decorator(func):
+        func.query_budget = queries
+        return func
+
+    return decorator
+
+
+def view_budget(view_class, action, method):
+    """
+    Return the query budget of a view handler.
+    A budget set with @query_budget on the handler wins over the
+    `query_budgets` dict of the class, which is keyed on the viewset action
+    or, for plain views, on the lower case HTTP method.
+    :param view_class:
+    :param action: viewset action, None for plain views
+    :param method: HTTP method
+    :return: int or None
+    """
+    name = action or method.lower()
+    budget = getattr(getattr(view_class, name, None), 'query_budget', None)
+    if budget is None:
+        budget = getattr(view_class, 'query_budgets', {}).get(name)
+
+    return budget
+
+
+def iter_routes(urlconf=None, namespace=None):
+    """
+    Yield the (name, callback) of every named URL pattern of a urlconf
+    :param urlconf: urlconf module path, the root urlconf by default
+    :param namespace: namespace of the patterns
+    :return: generator
+    """
+    patterns = get_resolver(urlconf).url_patterns \
+        if isinstance(urlconf, str) or urlconf is None else urlconf
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            nested = pattern.namespace or namespace
+            if namespace and pattern.namespace:
+                nested = f'{namespace}:{pattern.namespace}'
+            yield from iter_routes(pattern.url_patterns, nested)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace \
+                else pattern.name
+            yield name, pattern.callback
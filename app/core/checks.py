@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+def process_local_caches(aliases):
+    """
+    Return the cache aliases whose entries are not shared between processes
+    :param aliases:
+    :return: sorted list
+    """
+    return sorted({alias for alias in aliases
+                   if settings.CACHES[alias]['BACKEND']
+                   in PROCESS_LOCAL_CACHES})
+
+
+def invalidated_caches():
+    """
+    Return the aliases of the caches whose entries are invalidated on
+    writes, the auth token and response caches
+    :return: tuple
+    """
+    return settings.AUTH_TOKEN_CACHE_ALIAS, settings.RESPONSE_CACHE_ALIAS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """
+    Require shared auth and response caches in deployments, a process
+    local cache keeps a deleted token or a stale list valid in the other
+    processes
+    """
+    return [
+        Error(
+            f'The cache {alias} is local to each process.',
+            hint='Set CACHE_BACKEND to a cache shared by every process, '
+                 'such as memcached.',
+            id='core.E001',
+        )
+        for alias in process_local_caches(invalidated_caches())
+    ]
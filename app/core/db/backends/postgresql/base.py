@@ -0,0 +1,140 @@
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from psycopg2 import extensions
+
+from core.db.backends.postgresql.creation import DatabaseCreation
+from core.db.pool import PoolTimeout, get_pool
+
+Database = base.Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend with connection health checks and an optional
+    in-process connection pool.
+
+    Extra DATABASES keys:
+    CONN_HEALTH_CHECKS -- check a persistent connection still works the
+        first time it is used in a request, and a pooled one when it is
+        taken from the pool
+    POOL -- dict with SIZE, MAX_OVERFLOW and TIMEOUT; pooling is enabled
+        when SIZE is positive. Closing a connection then returns it to the
+        pool, so it combines with CONN_MAX_AGE = 0.
+    """
+
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.pool = None
+
+    @property
+    def health_checks_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_pool(self, conn_params):
+        """
+        Return the connection pool for the given parameters, or None
+        :param conn_params:
+        :return: ConnectionPool or None
+        """
+        options = self.settings_dict.get('POOL') or {}
+        size = options.get('SIZE', 0)
+        if size <= 0:
+            return None
+
+        return get_pool(
+            self.alias,
+            repr(sorted(conn_params.items())),
+            size,
+            options.get('MAX_OVERFLOW', 0),
+            options.get('TIMEOUT', 30),
+        )
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+
+        check = self._check_raw if self.health_checks_enabled else None
+        try:
+            connection = self.pool.acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params
+                ),
+                check
+            )
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc))
+
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+
+        connection, pool = self.connection, self.pool
+        self.pool = None
+        pool.release(connection, discard=not self._reset_raw(connection))
+
+    def _check_raw(self, connection):
+        """
+        Return whether a raw connection still answers queries
+        :param connection: psycopg2 connection
+        :return: bool
+        """
+        if connection.closed:
+            return False
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except Database.Error:
+            return False
+
+        return True
+
+    def _reset_raw(self, connection):
+        """
+        Roll back whatever a raw connection left open before pooling it
+        :param connection: psycopg2 connection
+        :return: bool, whether the connection can be reused
+        """
+        if connection.closed or self.in_atomic_block:
+            return False
+
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+
+        try:
+            connection.rollback()
+        except Database.Error:
+            return False
+
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    @async_unsafe
+    def ensure_connection(self):
+        if self.connection is not None and self.health_checks_enabled and \
+                not self.health_check_done and not self.in_atomic_block:
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+
+        super().ensure_connection()
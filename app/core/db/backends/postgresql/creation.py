@@ -0,0 +1,12 @@
+from django.db.backends.postgresql import creation
+
+from core.db.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def destroy_test_db(self, *args, **kwargs):
+        """Close pooled connections, which would block DROP DATABASE"""
+        self.connection.close()
+        close_pools(self.connection.alias)
+        return super().destroy_test_db(*args, **kwargs)
@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up in time"""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of raw database connections.
+
+    Keeps up to `size` idle connections for reuse and lets up to
+    `max_overflow` more be opened during bursts, which are closed again
+    when returned. Once `size + max_overflow` connections are checked out,
+    callers wait up to `timeout` seconds for one to be returned.
+    """
+
+    def __init__(self, size, max_overflow=0, timeout=30):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self._idle = deque()
+        self._checked_out = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, connect, check=None):
+        """
+        Return an idle connection, or open one with `connect`
+        :param connect: callable returning a new connection
+        :param check: callable returning whether an idle connection works
+        :return: connection
+        :raises PoolTimeout: when the pool stays exhausted for `timeout`
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while not self._idle and \
+                    self._checked_out >= self.size + self.max_overflow:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f'No connection available within {self.timeout}s'
+                    )
+                self._waits += 1
+                self._condition.wait(remaining)
+
+            self._checked_out += 1
+            connection = self._idle.pop() if self._idle else None
+
+        if connection is not None and check is not None and \
+                not check(connection):
+            self._close(connection)
+            connection = None
+
+        if connection is None:
+            try:
+                connection = connect()
+            except Exception:
+                self.release(None)
+                raise
+
+        return connection
+
+    def release(self, connection, discard=False):
+        """
+        Return a checked out connection to the pool
+        :param connection: connection, or None to only free the slot
+        :param discard: close the connection instead of keeping it
+        :return: None
+        """
+        with self._condition:
+            self._checked_out -= 1
+            keep = connection is not None and not discard and \
+                len(self._idle) < self.size
+            if keep:
+                self._idle.append(connection)
+            self._condition.notify()
+
+        if connection is not None and not keep:
+            self._close(connection)
+
+    def close(self):
+        """
+        Close every idle connection
+        :return: None
+        """
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+
+        for connection in idle:
+            self._close(connection)
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.warning('Failed to close pooled connection', exc_info=True)
+
+    def stats(self):
+        """
+        Return the utilization of the pool
+        :return: dict
+        """
+        with self._condition:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'checked_out': self._checked_out,
+                'idle': len(self._idle),
+                'overflow': max(0, self._checked_out - self.size),
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, key, size, max_overflow, timeout):
+    """
+    Return the pool of a database alias in this process.
+    Pools are keyed on the process id so forked workers never share the
+    sockets of their parent, and on the connection parameters so a
+    connection to another database is never handed out.
+    :param alias: database alias
+    :param key: hashable description of the connection parameters
+    :param size:
+    :param max_overflow:
+    :param timeout:
+    :return: ConnectionPool
+    """
+    pool_key = (os.getpid(), alias, key)
+    with _pools_lock:
+        pool = _pools.get(pool_key)
+        if pool is None:
+            pool = ConnectionPool(size, max_overflow, timeout)
+            _pools[pool_key] = pool
+
+        return pool
+
+
+def pool_stats():
+    """
+    Return the utilization of every pool of this process by alias
+    :return: dict
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [(alias, pool) for (pool_pid, alias, _), pool
+                 in _pools.items() if pool_pid == pid]
+
+    stats = {}
+    for alias, pool in pools:
+        totals = stats.setdefault(alias, {})
+        for name, value in pool.stats().items():
+            totals[name] = totals.get(name, 0) + value
+
+    return stats
+
+
+def close_pools(alias):
+    """
+    Close the idle connections of every pool of a database alias
+    :param alias: database alias
+    :return: None
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for (pool_pid, pool_alias, _), pool in _pools.items()
+                 if pool_pid == pid and pool_alias == alias]
+
+    for pool in pools:
+        pool.close()
+
+
+def pool_metrics():
+    """
+    Return the pool utilization as metric families for core.metrics
+    :return: list
+    """
+    stats = pool_stats()
+    gauges = []
+    for alias, values in sorted(stats.items()):
+        for state in ('checked_out', 'idle', 'overflow'):
+            gauges.append(('', {'alias': alias, 'state': state},
+                           values[state]))
+
+    return [
+        ('db_pool_connections', 'gauge', 'Pooled database connections',
+         gauges),
+        ('db_pool_waits_total', 'counter',
+         'Connection requests that waited for the pool',
+         [('', {'alias': alias}, values['waits'])
+          for alias, values in sorted(stats.items())]),
+        ('db_pool_timeouts_total', 'counter',
+         'Connection requests that timed out waiting for the pool',
+         [('', {'alias': alias}, values['timeouts'])
+          for alias, values in sorted(stats.items())]),
+    ]
@@ -0,0 +1,93 @@
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+
+_END = object()
+
+
+async def iterate_in_thread(iterable):
+    """
+    Iterate a sync iterable from async code.
+    Each item is fetched in the thread sync views run in, so iterators
+    reading the database, like a streamed export, keep using the
+    connection of the request instead of touching it from the event loop.
+    :param iterable:
+    :return: async generator
+    """
+    iterator = iter(iterable)
+    fetch = sync_to_async(next, thread_sensitive=True)
+    while True:
+        item = await fetch(iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+class ProjectASGIHandler(ASGIHandler):
+    """
+    ASGI handler routing through settings.ASGI_URLCONF and streaming
+    responses without blocking the event loop
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.urlconf = getattr(settings, 'ASGI_URLCONF', None)
+
+    def create_request(self, scope, body_file):
+        """
+        Create the request, routed through the ASGI urlconf
+        :param scope:
+        :param body_file:
+        :return: (request, None) or (None, error response)
+        """
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None and self.urlconf:
+            request.urlconf = self.urlconf
+
+        return request, error_response
+
+    async def send_response(self, response, send):
+        """
+        Send the response, fetching streamed parts in the sync thread
+        :param response:
+        :param send:
+        :return: None
+        """
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        )
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': headers,
+            })
+            async for part in iterate_in_thread(response):
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body'})
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application():
+    """
+    Return the ASGI application of the project
+    :return: ProjectASGIHandler
+    """
+    django.setup(set_prefix=False)
+
+    return ProjectASGIHandler()
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+MAX_CHECK_THREADS = 8
+
+_refresh_lock = threading.Lock()
+_checks_lock = threading.Lock()
+_checks_state = {'pid': None, 'executor': None, 'in_flight': {}}
+_readiness_state = {'pid': None, 'expires': 0.0, 'result': None}
+
+
+def check_database():
+    """Raise if the default database does not answer a query"""
+    connection = connections['default']
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        connection.close()
+
+
+def check_media():
+    """Raise if the media volume is missing or not writable"""
+    if not os.path.isdir(settings.MEDIA_ROOT):
+        raise OSError(f'{settings.MEDIA_ROOT} is not a directory')
+    if not os.access(settings.MEDIA_ROOT, os.W_OK | os.X_OK):
+        raise OSError(f'{settings.MEDIA_ROOT} is not writable')
+
+
+def check_migrations():
+    """Raise if the default database has unapplied migrations"""
+    connection = connections['default']
+    try:
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    finally:
+        connection.close()
+
+    if plan:
+        raise RuntimeError(f'{len(plan)} unapplied migrations')
+
+
+READINESS_CHECKS = {
+    'database': check_database,
+    'media': check_media,
+    'migrations': check_migrations,
+}
+
+
+def _timed(check):
+    start = time.monotonic()
+    check()
+    return round((time.monotonic() - start) * 1000, 2)
+
+
+def _check_state():
+    """
+    Return the check thread pool and in-flight runs of this process,
+    starting afresh in a forked worker
+    """
+    if _checks_state['pid'] != os.getpid():
+        _checks_state.update(
+            pid=os.getpid(),
+            executor=ThreadPoolExecutor(max_workers=MAX_CHECK_THREADS,
+                                        thread_name_prefix='health'),
+            in_flight={},
+        )
+
+    return _checks_state
+
+
+def run_checks(checks, timeout):
+    """
+    Run checks concurrently in a thread pool shared by every probe.
+    A check that does not finish within the timeout is reported as
+    failed without waiting for it. It is not started again while that run
+    is still going, later probes wait on the same run instead, so a hung
+    check holds a single thread.
+    :param checks: dict of name to callable raising on failure
+    :param timeout: seconds to wait for all checks
+    :return: dict of name to result dict
+    """
+    with _checks_lock:
+        state = _check_state()
+        futures = {}
+        for name, check in checks.items():
+            future = state['in_flight'].get((name, check))
+            if future is None or future.done():
+                future = state['executor'].submit(_timed, check)
+                state['in_flight'][(name, check)] = future
+            futures[name] = future
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            results[name] = {'ok': False, 'error': 'timeout'}
+        elif future.exception() is not None:
+            results[name] = {'ok': False, 'error': str(future.exception())}
+        else:
+            results[name] = {'ok': True, 'duration_ms': future.result()}
+
+    return results
+
+
+def readiness():
+    """
+    Return the readiness check results, cached for HEALTH_CACHE_TIMEOUT.
+    The result is kept in the process, never in a shared cache, so each
+    instance reports its own checks. Only one thread refreshes an expired
+    result, the others wait for it.
+    :return: (ready, results)
+    """
+    state = _readiness_state
+    if state['pid'] != os.getpid() or state['expires'] <= time.monotonic():
+        with _refresh_lock:
+            if state['pid'] != os.getpid() or \
+                    state['expires'] <= time.monotonic():
+                results = run_checks(READINESS_CHECKS,
+                                     settings.HEALTH_CHECK_TIMEOUT)
+                ready = all(result['ok'] for result in results.values())
+                state.update(
+                    pid=os.getpid(),
+                    expires=time.monotonic() + settings.HEALTH_CACHE_TIMEOUT,
+                    result=(ready, results),
+                )
+
+    return state['result']
@@ -0,0 +1,148 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare read throughput of the ASGI and WSGI
+    applications at high concurrency.
+
+    Both applications are driven in-process, so only the Django side of
+    the deployment is measured: the WSGI app is called from a pool of
+    threads the size of the concurrency, the way a threaded WSGI server
+    would, and the ASGI app from as many concurrent coroutines on one
+    event loop. List responses are cached, set RESPONSE_CACHE_TIMEOUT=0
+    to measure the database path.
+    """
+    help = 'Compare ASGI and WSGI read throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='user the requests are sent as')
+        parser.add_argument('--path', default='/api/rockband/bands/')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=64)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        token, _ = Token.objects.get_or_create(user=user)
+        url = urlsplit(options['path'])
+        total = options['requests']
+        concurrency = options['concurrency']
+
+        from app.asgi import application as asgi_app
+        from app.wsgi import application as wsgi_app
+
+        results = (
+            ('wsgi', self.run_wsgi(wsgi_app, url, token.key,
+                                   total, concurrency)),
+            ('asgi', asyncio.run(self.run_asgi(asgi_app, url, token.key,
+                                               total, concurrency))),
+        )
+        for name, (elapsed, errors) in results:
+            self.stdout.write(
+                f'{name}: {total} requests, concurrency {concurrency}, '
+                f'{elapsed:.2f}s, {total / elapsed:.1f} req/s, '
+                f'{errors} errors'
+            )
+
+        wsgi_elapsed, asgi_elapsed = results[0][1][0], results[1][1][0]
+        self.stdout.write(self.style.SUCCESS(
+            f'asgi/wsgi throughput: {wsgi_elapsed / asgi_elapsed:.2f}x'
+        ))
+
+    def run_wsgi(self, app, url, token, total, concurrency):
+        """
+        Send the requests to the WSGI app from a thread pool
+        :return: (elapsed seconds, error count)
+        """
+        def request(_):
+            status = []
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'SCRIPT_NAME': '',
+                'PATH_INFO': url.path,
+                'QUERY_STRING': url.query,
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Token {token}',
+                'wsgi.version': (1, 0),
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': io.StringIO(),
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            body = app(environ, lambda code, headers: status.append(code))
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+
+            return status[0].startswith('200')
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            ok = sum(pool.map(request, range(total)))
+
+        return time.perf_counter() - start, total - ok
+
+    async def run_asgi(self, app, url, token, total, concurrency):
+        """
+        Send the requests to the ASGI app from concurrent coroutines
+        :return: (elapsed seconds, error count)
+        """
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', b'localhost'),
+                (b'authorization', f'Token {token}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        remaining = iter(range(total))
+        errors = 0
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def client():
+            nonlocal errors
+            for _ in remaining:
+                status = []
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        status.append(message['status'])
+
+                await app(dict(scope), receive, send)
+                if status[0] != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+        return time.perf_counter() - start, errors
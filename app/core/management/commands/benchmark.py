@@ -0,0 +1,128 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core.bench import compare, discover, time_case
+
+
+class Command(BaseCommand):
+    """
+    Django command to run the microbenchmarks of the installed apps.
+
+    Each benchmark case is timed at every data size and the results are
+    written as JSON, which can be stored and passed back as the baseline of
+    a later run. By default the cases run in a throwaway test database,
+    created on the configured backend, so SQLite and a local Postgres are
+    both measured without touching their data; with --in-place the data is
+    seeded in the configured database and rolled back afterwards.
+    """
+    help = 'Run the microbenchmarks and compare them against a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000',
+                            help='comma separated data sizes')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='timed runs per case and size')
+        parser.add_argument('--only', default='',
+                            help='run the cases starting with this prefix')
+        parser.add_argument('--output', default='-',
+                            help='JSON results file, - for stdout')
+        parser.add_argument('--baseline', help='JSON results to compare to')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='allowed slowdown over the baseline')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--in-place', action='store_true',
+                            help='seed the configured database itself')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError(f'Invalid sizes {options["sizes"]}')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)['results']
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f'Invalid baseline: {exc}')
+
+        connection = connections[options['database']]
+        if options['in_place']:
+            with transaction.atomic(using=options['database']):
+                results = self.run(sizes, options)
+                transaction.set_rollback(True, using=options['database'])
+        else:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                results = self.run(sizes, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'vendor': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sizes': sizes,
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if baseline is not None:
+            self.check_baseline(results, baseline, options['threshold'])
+
+    def run(self, sizes, options):
+        """
+        Time every selected case at every size
+        :return: list of result dicts
+        """
+        results = []
+        for size in sizes:
+            for label, module in discover().items():
+                cases = {f'{label}.{case}': factory
+                         for case, factory in module.CASES.items()
+                         if f'{label}.{case}'.startswith(options['only'])}
+                if not cases:
+                    continue
+                context = module.prepare(size)
+                for name, factory in cases.items():
+                    timing = time_case(factory(context), options['repeat'])
+                    results.append(dict(name=name, size=size, **timing))
+                    self.stderr.write(
+                        f'{name}[{size}]: {timing["median_ms"]:.3f}ms'
+                    )
+
+        return results
+
+    def check_baseline(self, results, baseline, threshold):
+        """
+        Report the cases slower than the baseline
+        :raise CommandError: when a case regressed
+        """
+        regressions = compare(results, baseline, threshold)
+        for name, size, before, after, ratio in regressions:
+            self.stderr.write(
+                f'{name}[{size}]: {before:.3f}ms -> {after:.3f}ms '
+                f'({ratio:.2f}x)'
+            )
+
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} benchmarks regressed by more than '
+                f'{threshold:.0%}'
+            )
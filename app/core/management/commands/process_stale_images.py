@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from rockband.images import process_stale_images
+
+
+class Command(BaseCommand):
+    """
+    Django command to process the band images left pending or processing,
+    by a restart or crash of the process that queued them
+    """
+    help = 'Process band images stuck pending or processing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=float, default=600,
+                            help='seconds since the band last changed')
+
+    def handle(self, *args, **options):
+        band_ids = process_stale_images(
+            timedelta(seconds=options['older_than'])
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed the images of {len(band_ids)} bands'
+        ))
@@ -0,0 +1,119 @@
+import os
+import random
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.checks import invalidated_caches, process_local_caches
+from core.metrics import registry
+from core.server import Arbiter, bind_socket, load_application, \
+    prepare_fork, serve_asgi, serve_wsgi, warm_up, worker_exiting
+
+
+def parse_bind(value):
+    """
+    Return the host and port of a HOST:PORT address
+    :param value:
+    :return: (str, int)
+    """
+    host, sep, port = value.rpartition(':')
+    if not sep or not port.isdigit():
+        raise CommandError(f'Invalid bind address {value}, use HOST:PORT')
+
+    return host.strip('[]') or '0.0.0.0', int(port)
+
+
+class Command(BaseCommand):
+    """
+    Django command to serve the project with preforked worker processes.
+
+    The application is loaded and warmed up once, then forked, so workers
+    share its memory copy-on-write. Send SIGHUP for a graceful restart of
+    every worker and SIGTERM or SIGINT to stop. Stopping workers finish
+    their in-flight requests and background tasks first.
+
+    More than one worker needs the auth and response caches shared between
+    processes, otherwise a worker keeps serving what another invalidated.
+    Their metrics are added up through files in --metrics-dir.
+    """
+    help = 'Serve the project with preforked worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000',
+                            help='HOST:PORT to listen on')
+        parser.add_argument('--interface', choices=('wsgi', 'asgi'),
+                            default='wsgi',
+                            help='serve app.wsgi or app.asgi')
+        parser.add_argument('--workers', type=int,
+                            default=int(os.environ.get('WEB_CONCURRENCY',
+                                                       os.cpu_count() or 1)))
+        parser.add_argument('--threads', type=int, default=4,
+                            help='request threads per WSGI worker')
+        parser.add_argument('--max-requests', type=int, default=0,
+                            help='recycle a worker after this many requests')
+        parser.add_argument('--max-requests-jitter', type=int, default=0,
+                            help='random extra requests per worker, so '
+                                 'workers do not recycle at once')
+        parser.add_argument('--keep-alive', type=float, default=5,
+                            help='seconds to wait for the next request on '
+                                 'a keep-alive connection')
+        parser.add_argument('--graceful-timeout', type=float, default=30)
+        parser.add_argument('--backlog', type=int, default=2048)
+        parser.add_argument('--metrics-dir', default=settings.METRICS_DIR,
+                            help='directory the workers share their '
+                                 'metrics through, a temporary one when '
+                                 'empty')
+
+    def handle(self, *args, **options):
+        host, port = parse_bind(options['bind'])
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        if options['workers'] > 1:
+            local = process_local_caches(invalidated_caches())
+            if local:
+                raise CommandError(
+                    f'Caches {", ".join(local)} are local to each process, '
+                    f'set CACHE_BACKEND to a shared cache to run more than '
+                    f'one worker'
+                )
+        if options['interface'] == 'asgi':
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError('Serving ASGI requires uvicorn')
+
+        if options['workers'] > 1:
+            registry.share(options['metrics_dir'] or
+                           tempfile.mkdtemp(prefix='metrics-'))
+
+        application = load_application(options['interface'])
+        warm_up(getattr(application, 'urlconf', None))
+        sock = bind_socket(host, port, options['backlog'])
+        serve = serve_asgi if options['interface'] == 'asgi' else serve_wsgi
+
+        def worker(sock):
+            max_requests = options['max_requests']
+            if max_requests:
+                max_requests += random.randint(
+                    0, options['max_requests_jitter']
+                )
+            try:
+                serve(application, sock, options['threads'], max_requests,
+                      options['keep_alive'])
+            finally:
+                worker_exiting.send(sender=self.__class__,
+                                    timeout=options['graceful_timeout'])
+                registry.flush()
+
+        self.log(f'Listening at {host}:{sock.getsockname()[1]} '
+                 f'({options["interface"]}, {options["workers"]} workers)')
+        prepare_fork()
+        Arbiter(sock, worker, options['workers'],
+                options['graceful_timeout'], self.log,
+                worker_exited=registry.archive_worker).run()
+        self.log('Stopped')
+
+    def log(self, message):
+        self.stdout.write(message)
+        self.stdout.flush()
@@ -0,0 +1,382 @@
+import json
+import os
+import threading
+import uuid
+from contextvars import ContextVar
+from time import monotonic, perf_counter
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                    10.0)
+# Seconds between writes of a worker's metrics to the shared directory
+FLUSH_INTERVAL = 1.0
+ARCHIVE_FILE = 'archive.json'
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Time spent by one request in the database, serializers and renderers
+    """
+    __slots__ = ('start', 'db_count', 'db_time', 'serialize', 'render',
+                 'serializing')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.serializing = False
+
+    def server_timing(self, total):
+        """
+        Return the timings as a Server-Timing header value
+        :param total: seconds since the request started
+        :return: str
+        """
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.2f};'
+            f'desc="{self.db_count} queries"',
+            f'serialize;dur={self.serialize * 1000:.2f}',
+            f'render;dur={self.render * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query to the current request
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_count += 1
+        timings.db_time += perf_counter() - start
+
+
+def render_response(response):
+    """
+    Render a response, adding the time taken to the current request
+    :param response: SimpleTemplateResponse
+    :return: None
+    """
+    timings = current_timings.get()
+    start = perf_counter()
+    response.render()
+    if timings is not None:
+        timings.render += perf_counter() - start
+
+
+class TimedSerializerMixin:
+    """
+    Add the time spent in to_representation to the current request.
+    Nested serializers are counted once, as part of their parent.
+    """
+
+    def to_representation(self, instance):
+        timings = current_timings.get()
+        if timings is None or timings.serializing:
+            return super().to_representation(instance)
+
+        timings.serializing = True
+        start = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serializing = False
+            timings.serialize += perf_counter() - start
+
+
+class RouteStats:
+    """Aggregated timings of one route and method"""
+
+    def __init__(self, buckets):
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.duration = 0.0
+        self.statuses = {}
+        self.db_count = 0
+        self.db_time = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+
+
+def _labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) \
+        + '}'
+
+
+class MetricsRegistry:
+    """
+    Request metrics, rendered in the Prometheus text format.
+
+    Each process records its own requests. Once shared through a
+    directory, every worker writes its metrics there at most every
+    FLUSH_INTERVAL and on each scrape, and a scrape adds up the files of
+    all workers, so any worker answers with the counters of the whole
+    server. Gauges are reported per worker with a pid label. The metrics
+    of exited workers are kept in an archive file, so counters never go
+    back when workers are recycled.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.directory = None
+        self._routes = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed = 0.0
+        self._worker = None
+
+    def observe(self, route, method, status, duration, timings):
+        """
+        Record a finished request
+        :param route: URL pattern name
+        :param method: HTTP method
+        :param status: response status code
+        :param duration: seconds taken
+        :param timings: RequestTimings of the request
+        :return: None
+        """
+        with self._lock:
+            stats = self._routes.get((route, method))
+            if stats is None:
+                stats = self._routes[(route, method)] = \
+                    RouteStats(self.buckets)
+
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    stats.bucket_counts[index] += 1
+                    break
+            stats.count += 1
+            stats.duration += duration
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.db_count += timings.db_count
+            stats.db_time += timings.db_time
+            stats.serialize += timings.serialize
+            stats.render += timings.render
+
+        if self.directory and monotonic() - self._flushed >= FLUSH_INTERVAL:
+            self.flush()
+
+    def register_collector(self, collector):
+        """
+        Add a callable returning extra metric families, each a tuple of
+        (name, type, help, [(name suffix, labels dict, value), ...])
+        :param collector:
+        :return: None
+        """
+        self._collectors.append(collector)
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+    def share(self, directory):
+        """
+        Aggregate the metrics of every process writing to the directory.
+        Call before forking the workers. Metrics left in the directory by
+        an earlier server are removed.
+        :param directory: path of an existing directory
+        :return: None
+        """
+        for name in os.listdir(directory):
+            if name.endswith(('.json', '.tmp')):
+                os.remove(os.path.join(directory, name))
+        self.directory = directory
+
+    def _worker_file(self):
+        """
+        Return the file name of this process, unique per forked worker
+        """
+        pid = os.getpid()
+        if self._worker is None or self._worker[0] != pid:
+            self._worker = (pid, f'{pid}-{uuid.uuid4().hex[:8]}.json')
+
+        return self._worker[1]
+
+    def flush(self):
+        """
+        Write the metrics of this process to the shared directory
+        :return: None
+        """
+        if not self.directory:
+            return
+
+        with self._flush_lock:
+            self._flushed = monotonic()
+            path = os.path.join(self.directory, self._worker_file())
+            _write_json(path, list(self._local_families()))
+
+    def archive_worker(self, pid):
+        """
+        Move the counters of an exited worker into the archive file.
+        Only the process that reaps the workers calls it.
+        :param pid:
+        :return: None
+        """
+        if not self.directory:
+            return
+
+        names = [name for name in os.listdir(self.directory)
+                 if name.startswith(f'{pid}-')]
+        if not names:
+            return
+
+        archive = _read_json(os.path.join(self.directory, ARCHIVE_FILE),
+                             {'families': [], 'merged': []})
+        workers = [(None, archive['families'])]
+        for name in names:
+            families = _read_json(os.path.join(self.directory, name), [])
+            workers.append((None, [family for family in families
+                                   if family[1] != 'gauge']))
+        _write_json(os.path.join(self.directory, ARCHIVE_FILE), {
+            'families': list(_merge_families(workers)),
+            'merged': names,
+        })
+        for name in names:
+            os.remove(os.path.join(self.directory, name))
+
+    def _families(self):
+        """
+        Return the metric families of this process, or of every worker
+        once shared through a directory
+        """
+        if not self.directory:
+            return self._local_families()
+
+        self.flush()
+        archive = _read_json(os.path.join(self.directory, ARCHIVE_FILE),
+                             {'families': [], 'merged': []})
+        workers = [(None, archive['families'])]
+        for name in sorted(os.listdir(self.directory)):
+            if name == ARCHIVE_FILE or not name.endswith('.json') or \
+                    name in archive['merged']:
+                continue
+            families = _read_json(os.path.join(self.directory, name), None)
+            if families is not None:
+                workers.append((name.split('-', 1)[0], families))
+
+        return _merge_families(workers)
+
+    def _local_families(self):
+        with self._lock:
+            routes = sorted(self._routes.items())
+
+        histogram = []
+        requests = []
+        totals = {
+            'db_queries': [],
+            'db_seconds': [],
+            'serialize_seconds': [],
+            'render_seconds': [],
+        }
+        for (route, method), stats in routes:
+            labels = {'route': route, 'method': method}
+            cumulative = 0
+            for bound, count in zip(self.buckets, stats.bucket_counts):
+                cumulative += count
+                histogram.append(
+                    ('_bucket', dict(labels, le=repr(bound)), cumulative)
+                )
+            histogram.append(('_bucket', dict(labels, le='+Inf'),
+                              stats.count))
+            histogram.append(('_sum', labels, stats.duration))
+            histogram.append(('_count', labels, stats.count))
+            for status, count in sorted(stats.statuses.items()):
+                requests.append(('', dict(labels, status=status), count))
+            totals['db_queries'].append(('', labels, stats.db_count))
+            totals['db_seconds'].append(('', labels, stats.db_time))
+            totals['serialize_seconds'].append(('', labels,
+                                                stats.serialize))
+            totals['render_seconds'].append(('', labels, stats.render))
+
+        yield ('http_request_duration_seconds', 'histogram',
+               'Request latency by route', histogram)
+        yield ('http_requests_total', 'counter',
+               'Requests by route and status', requests)
+        yield ('http_request_db_queries_total', 'counter',
+               'Database queries run by requests', totals['db_queries'])
+        yield ('http_request_db_seconds_total', 'counter',
+               'Time requests spent in database queries',
+               totals['db_seconds'])
+        yield ('http_request_serialize_seconds_total', 'counter',
+               'Time requests spent in serializers',
+               totals['serialize_seconds'])
+        yield ('http_request_render_seconds_total', 'counter',
+               'Time requests spent rendering responses',
+               totals['render_seconds'])
+        for collector in self._collectors:
+            yield from collector()
+
+    def render(self):
+        """
+        Return every metric in the Prometheus text exposition format
+        :return: str
+        """
+        lines = []
+        for name, kind, help_text, samples in self._families():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for suffix, labels, value in samples:
+                label_text = _labels(labels) if labels else ''
+                lines.append(f'{name}{suffix}{label_text} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _write_json(path, value):
+    """Replace a file with the JSON of a value in one step"""
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(value, f)
+    os.replace(temporary, path)
+
+
+def _read_json(path, default):
+    """Return the JSON value of a file, default if it is gone"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _merge_families(workers):
+    """
+    Add up the samples of several processes.
+    Counters and histograms are summed, gauges are kept per process with
+    a pid label.
+    :param workers: list of (pid or None, families)
+    :return: generator of families
+    """
+    merged = {}
+    for pid, families in workers:
+        for name, kind, help_text, samples in families:
+            family = merged.setdefault(name, (kind, help_text, {}))
+            for suffix, labels, value in samples:
+                if kind == 'gauge' and pid is not None:
+                    labels = dict(labels, pid=pid)
+                key = (suffix, tuple(sorted(labels.items())))
+                if key in family[2]:
+                    family[2][key][2] += value
+                else:
+                    family[2][key] = [suffix, labels, value]
+
+    for name, (kind, help_text, samples) in merged.items():
+        yield name, kind, help_text, list(samples.values())
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,90 @@
+import logging
+from time import perf_counter
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from core.budget import QueryBudgetExceeded, view_budget
+from core.metrics import RequestTimings, current_timings, registry
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class RequestTimingMiddleware(MiddlewareMixin):
+    """
+    Time each request and where it spends it.
+
+    Database queries are counted by the execute wrapper core.signals
+    installs on every connection, serializer time by TimedSerializerMixin.
+    The timings are sent in a Server-Timing header when SERVER_TIMING is
+    on and aggregated per route in core.metrics.registry.
+    """
+
+    def process_request(self, request):
+        request.timings = RequestTimings()
+        current_timings.set(request.timings)
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, 'timings', None)
+        if timings is not None and not response.is_rendered:
+            start = perf_counter()
+
+            def rendered(response):
+                timings.render += perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+
+        return response
+
+    def process_response(self, request, response):
+        timings = getattr(request, 'timings', None)
+        if timings is None:
+            return response
+
+        current_timings.set(None)
+        duration = perf_counter() - timings.start
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else UNMATCHED_ROUTE
+        registry.observe(route, request.method, response.status_code,
+                         duration, timings)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(duration)
+
+        return response
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """
+    Check requests against the query budget of their view.
+
+    Relies on the query count of core.middleware.RequestTimingMiddleware.
+    QUERY_BUDGET 'warn' logs requests over budget, 'raise' fails them
+    with QueryBudgetExceeded and 'off' skips the check.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if settings.QUERY_BUDGET == 'off' or view_class is None:
+            return None
+
+        actions = getattr(view_func, 'actions', None) or {}
+        request.query_budget = view_budget(
+            view_class, actions.get(request.method.lower()), request.method
+        )
+        return None
+
+    def process_response(self, request, response):
+        budget = getattr(request, 'query_budget', None)
+        timings = getattr(request, 'timings', None)
+        if budget is None or timings is None or timings.db_count <= budget:
+            return response
+
+        message = (f'{request.method} {request.path} ran '
+                   f'{timings.db_count} queries, over its budget of {budget}')
+        if settings.QUERY_BUDGET == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+        return response
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:31
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_band_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='band',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
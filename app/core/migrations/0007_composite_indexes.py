@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_band_modified'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='band',
+            index=models.Index(fields=['user', 'id'], name='core_band_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['user', 'name'], name='core_member_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name'], name='core_tag_user_name_idx'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_band_tags_tag_band_idx '
+            'ON core_band_tags (tag_id, band_id)',
+            'DROP INDEX core_band_tags_tag_band_idx',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_band_members_member_band_idx '
+            'ON core_band_members (member_id, band_id)',
+            'DROP INDEX core_band_members_member_band_idx',
+        ),
+    ]
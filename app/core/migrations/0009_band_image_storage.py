@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:38
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_band_image_processing'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='band',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.band_image_storage, upload_to=core.models.band_image_file_path),
+        ),
+    ]
@@ -5,6 +5,8 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
 from django.conf import settings
 
+from core.storage import band_image_storage
+
 
 def band_image_file_path(instance, filename):
     """
@@ -60,6 +62,12 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name'],
+                         name='core_tag_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -74,6 +82,12 @@ class Member(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name'],
+                         name='core_member_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -82,6 +96,19 @@ class Band(models.Model):
     """
     Band object
     """
+    IMAGE_NONE = ''
+    IMAGE_PENDING = 'pending'
+    IMAGE_PROCESSING = 'processing'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_NONE, 'No image'),
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_PROCESSING, 'Processing'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
@@ -92,7 +119,37 @@ class Band(models.Model):
     link = models.CharField(max_length=255, blank=True)
     members = models.ManyToManyField('Member')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=band_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=band_image_file_path,
+        storage=band_image_storage
+    )
+    image_status = models.CharField(
+        max_length=16,
+        choices=IMAGE_STATUS_CHOICES,
+        default=IMAGE_NONE,
+        blank=True
+    )
+    image_variants = models.JSONField(default=dict, blank=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'],
+                         name='core_band_user_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class StoredFile(models.Model):
+    """
+    Lock row of a content addressed file.
+    Saving and releasing the file lock its row, so a file is not deleted
+    while a band starts to reference it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,368 @@
+import gc
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.apps import apps
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.db import connections
+from django.dispatch import Signal
+from django.urls import get_resolver
+from rest_framework.serializers import ModelSerializer
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+# Sent in a worker process once it stopped serving, before it exits, with
+# the graceful timeout left to finish background work
+worker_exiting = Signal()
+
+
+def load_application(interface):
+    """
+    Return the WSGI or ASGI application of the project
+    :param interface: 'wsgi' or 'asgi'
+    :return: callable
+    """
+    return import_module(f'app.{interface}').application
+
+
+def _serializer_classes(cls=ModelSerializer):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _serializer_classes(subclass)
+
+
+def warm_up(urlconf=None):
+    """
+    Do the lazy work of the first requests once, before workers fork.
+    Imports every app's urls, views and serializers, populates the URL
+    resolver and builds the fields of every model serializer, so the
+    resulting objects are shared copy-on-write by the workers.
+    :param urlconf: urlconf the application routes through,
+                    settings.ROOT_URLCONF when None
+    :return: None
+    """
+    for app_config in apps.get_app_configs():
+        for module in ('urls', 'views', 'serializers'):
+            try:
+                import_module(f'{app_config.name}.{module}')
+            except ModuleNotFoundError as exc:
+                if exc.name != f'{app_config.name}.{module}':
+                    raise
+
+    get_resolver(urlconf).reverse_dict
+
+    for serializer_class in _serializer_classes():
+        if getattr(getattr(serializer_class, 'Meta', None), 'model', None):
+            try:
+                serializer_class().fields
+            except Exception:
+                pass
+
+
+def bind_socket(host, port, backlog):
+    """
+    Return a listening socket the workers share
+    :param host:
+    :param port: 0 picks a free port
+    :param backlog:
+    :return: socket.socket
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class WorkerRequestHandler(WSGIRequestHandler):
+    """
+    Request handler counting every request of a keep-alive connection.
+
+    Idle connections are closed after the keep-alive timeout of the server,
+    and after the current request once the worker stops.
+    """
+
+    def setup(self):
+        self.timeout = self.server.keep_alive
+        super().setup()
+
+    def handle_one_request(self):
+        self.command = None
+        try:
+            super().handle_one_request()
+        except socket.timeout:
+            self.close_connection = True
+            return
+
+        if self.command and self.server.request_done():
+            self.close_connection = True
+
+
+class WorkerWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    """
+    WSGI server of one worker process, serving on an inherited socket.
+
+    Connections are handled by a fixed pool of threads, so persistent
+    database connections are reused across requests. While every thread
+    is busy no new connection is accepted, leaving it to other workers.
+    ThreadingMixIn only marks the server as threaded, which lets Django
+    keep connections alive. The shared socket does not block on accept,
+    so a worker losing a connection to another one goes back to waiting
+    and keeps noticing when it is stopped.
+    """
+
+    def __init__(self, sock, application, threads, max_requests=0,
+                 keep_alive=5):
+        super().__init__(sock.getsockname()[:2], WorkerRequestHandler,
+                         bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.socket.setblocking(False)
+        self.server_name, self.server_port = sock.getsockname()[:2]
+        self.setup_environ()
+        self.set_app(application)
+        self.max_requests = max_requests
+        self.keep_alive = keep_alive
+        self.requests_handled = 0
+        self.stopping = False
+        self._count_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(threads)
+        self._executor = ThreadPoolExecutor(max_workers=threads,
+                                            thread_name_prefix='wsgi')
+
+    def request_done(self):
+        """
+        Count a handled request
+        :return: True once the worker should stop serving
+        """
+        with self._count_lock:
+            self.requests_handled += 1
+
+        return self.done()
+
+    def done(self):
+        """Return whether the worker was stopped or served max requests"""
+        return self.stopping or bool(
+            self.max_requests and self.requests_handled >= self.max_requests
+        )
+
+    def get_request(self):
+        self._slots.acquire()
+        try:
+            if self.done():
+                raise OSError('The worker stopped serving')
+            return super().get_request()
+        except OSError:
+            self._slots.release()
+            raise
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def serve_wsgi(application, sock, threads, max_requests, keep_alive):
+    """
+    Serve WSGI requests until stopped or max_requests were handled.
+    In-flight requests are finished before returning.
+    :return: None
+    """
+    server = WorkerWSGIServer(sock, application, threads, max_requests,
+                              keep_alive)
+    server.timeout = 1
+
+    def stop(signum, frame):
+        server.stopping = True
+
+    for signum in STOP_SIGNALS:
+        signal.signal(signum, stop)
+
+    while not server.done():
+        server.handle_request()
+
+    server.server_close()
+
+
+def serve_asgi(application, sock, threads, max_requests, keep_alive):
+    """
+    Serve ASGI requests with uvicorn until stopped or max_requests
+    :return: None
+    """
+    import uvicorn
+
+    config = uvicorn.Config(
+        application,
+        lifespan='off',
+        limit_max_requests=max_requests or None,
+        timeout_keep_alive=keep_alive,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Arbiter:
+    """
+    Pre-fork process manager.
+
+    Forks `workers` copies of the current, warmed up process and keeps
+    that many running. SIGHUP forks a fresh set of workers and then
+    gracefully stops the old ones. SIGTERM and SIGINT stop every worker,
+    killing those still busy after `graceful_timeout` seconds.
+    """
+
+    def __init__(self, sock, worker, workers, graceful_timeout, log,
+                 worker_exited=None):
+        """
+        :param sock: listening socket shared with the workers
+        :param worker: callable serving on the socket in a worker process
+        :param workers: number of worker processes
+        :param graceful_timeout: seconds workers get to finish on stop
+        :param log: callable writing a line of output
+        :param worker_exited: callable called with the pid of each worker
+                              once it exited
+        """
+        self.sock = sock
+        self.worker = worker
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.log = log
+        self.worker_exited = worker_exited
+        self.children = {}
+        self.generation = 0
+        self._signals = []
+
+    def run(self):
+        """
+        Run the workers until a stop signal is received
+        :return: None
+        """
+        for signum in STOP_SIGNALS + (signal.SIGHUP,):
+            signal.signal(signum, self._signal)
+
+        try:
+            while True:
+                self.reap()
+                if self._signals:
+                    signum = self._signals.pop(0)
+                    if signum != signal.SIGHUP:
+                        self.stop()
+                        return
+                    self.reload()
+                self.spawn_missing()
+                time.sleep(0.1)
+        finally:
+            self.sock.close()
+
+    def _signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def spawn(self):
+        # Block the signals until the child reset their handlers, so a
+        # signal arriving meanwhile is not queued to the arbiter's handler
+        # in the child
+        signals = STOP_SIGNALS + (signal.SIGHUP,)
+        signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+        try:
+            pid = os.fork()
+        except BaseException:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+            raise
+        if pid == 0:
+            code = 0
+            try:
+                for signum in signals:
+                    signal.signal(signum, signal.SIG_DFL)
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+                self.worker(self.sock)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+        self.children[pid] = self.generation
+        self.log(f'Booted worker {pid}')
+
+    def spawn_missing(self):
+        running = sum(1 for generation in self.children.values()
+                      if generation == self.generation)
+        for _ in range(self.workers - running):
+            self.spawn()
+
+    def reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            self.children.pop(pid, None)
+            self.log(f'Worker {pid} exited with status {status >> 8}')
+            self.exited(pid)
+
+    def exited(self, pid):
+        if self.worker_exited is not None:
+            self.worker_exited(pid)
+
+    def terminate(self, pids, signum=signal.SIGTERM):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def reload(self):
+        """Replace every worker without dropping requests"""
+        old = list(self.children)
+        self.generation += 1
+        self.spawn_missing()
+        self.terminate(old)
+
+    def stop(self):
+        """Stop every worker, waiting for in-flight requests"""
+        self.terminate(list(self.children))
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+
+        self.terminate(list(self.children), signal.SIGKILL)
+        for pid in list(self.children):
+            os.waitpid(pid, 0)
+            self.children.pop(pid)
+            self.exited(pid)
+
+
+def prepare_fork():
+    """
+    Drop state that must not be shared with forked workers and keep the
+    warmed up objects out of garbage collection, so the pages holding them
+    stay shared copy-on-write
+    :return: None
+    """
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
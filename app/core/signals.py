@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_init, \
+    post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token
+from core.metrics import record_query
+from core.models import Band, Member, Tag
+from core.storage import lock_stored_file
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Drop a deleted token from the auth cache"""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drop the tokens of an updated or deactivated user from the cache"""
+    if created:
+        return
+
+    for key in Token.objects.filter(user=instance)\
+            .values_list('key', flat=True):
+        invalidate_token(key)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Count the queries of every connection towards request timings"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def touch_bands(queryset):
+    """
+    Mark the bands of a queryset as modified now
+    :param queryset: Band queryset
+    :return: None
+    """
+    queryset.update(modified=timezone.now())
+
+
+@receiver(m2m_changed, sender=Band.members.through)
+@receiver(m2m_changed, sender=Band.tags.through)
+def touch_band_relations(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Mark bands as modified when their members or tags change"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.modified = timezone.now()
+            Band.objects.filter(pk=instance.pk)\
+                .update(modified=instance.modified)
+    elif action in ('post_add', 'post_remove'):
+        touch_bands(Band.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        relation = 'members' if sender is Band.members.through else 'tags'
+        touch_bands(Band.objects.filter(**{relation: instance}))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tagged_bands(sender, instance, created=False, **kwargs):
+    """Mark the bands of a renamed or deleted tag as modified"""
+    if not created:
+        touch_bands(Band.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Member)
+@receiver(pre_delete, sender=Member)
+def touch_member_bands(sender, instance, created=False, **kwargs):
+    """Mark the bands of a renamed or deleted member as modified"""
+    if not created:
+        touch_bands(Band.objects.filter(members=instance))
+
+
+def release_band_image(name, variants):
+    """
+    Delete an image and its variants once no band references it.
+    The name is locked first, so a band saving the same content waits
+    until the files are gone and then stores them again.
+    :param name: storage name of the image
+    :param variants: storage names of its derived variants
+    :return: None
+    """
+    if not name:
+        return
+
+    with transaction.atomic():
+        lock_stored_file(name)
+        if Band.objects.filter(image=name).exists():
+            return
+
+        storage = Band._meta.get_field('image').storage
+        for stored in (name, *variants):
+            storage.delete(stored)
+
+
+@receiver(post_init, sender=Band)
+def remember_band_image(sender, instance, **kwargs):
+    """
+    Remember the stored image of a band to release it when replaced.
+    Instances loaded without the image remember None, the image is then
+    read before saving.
+    """
+    fields = instance.__dict__
+    if 'image' in fields and 'image_variants' in fields:
+        image = fields['image']
+        instance._stored_image = (getattr(image, 'name', image),
+                                  fields['image_variants'] or {})
+    else:
+        instance._stored_image = None
+
+
+@receiver(pre_save, sender=Band)
+def load_stored_image(sender, instance, update_fields=None, **kwargs):
+    """Read the stored image of a band loaded without it"""
+    if instance._stored_image is not None:
+        return
+
+    stored = None
+    if instance.pk and (update_fields is None or 'image' in update_fields):
+        stored = Band.objects.filter(pk=instance.pk)\
+            .values_list('image', 'image_variants').first()
+    instance._stored_image = stored or (None, {})
+
+
+def _release_on_commit(name, variants):
+    stored = [variant for formats in variants.values()
+              for variant in formats.values()]
+    transaction.on_commit(lambda: release_band_image(name, stored))
+
+
+@receiver(post_save, sender=Band)
+def release_replaced_image(sender, instance, **kwargs):
+    """Release the previous image of a band after it was replaced"""
+    fields = instance.__dict__
+    if 'image' in fields:
+        name, variants = instance._stored_image
+        if name and name != instance.image.name:
+            _release_on_commit(name, variants)
+
+    if 'image' in fields and 'image_variants' in fields:
+        instance._stored_image = (instance.image.name,
+                                  instance.image_variants)
+    else:
+        instance._stored_image = None
+
+
+@receiver(post_delete, sender=Band)
+def release_deleted_image(sender, instance, **kwargs):
+    """Release the image of a deleted band"""
+    _release_on_commit(instance.image.name, instance.image_variants)
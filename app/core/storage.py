@@ -0,0 +1,105 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connection
+
+
+def content_digest(content):
+    """
+    Return the sha256 hex digest of a file, reading it in chunks
+    :param content: File
+    :return: str
+    """
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+
+    return digest.hexdigest()
+
+
+def lock_stored_file(name):
+    """
+    Lock a stored file name until the current transaction ends
+    :param name: storage name
+    :return: None
+    """
+    from core.models import StoredFile
+
+    StoredFile.objects.bulk_create([StoredFile(name=name)],
+                                   ignore_conflicts=True)
+    StoredFile.objects.select_for_update().get(name=name)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files by the hash of their content.
+
+    Saving bytes that are already stored returns the existing name without
+    writing anything, so identical uploads share a single file. With
+    lock_names, a save inside a transaction locks the name until the
+    transaction ends, so saving the band that references the file in the
+    same transaction keeps core.signals.release_band_image from deleting
+    the file meanwhile.
+    """
+
+    def __init__(self, *args, lock_names=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock_names = lock_names
+
+    def save(self, name, content, max_length=None):
+        """
+        Save the content under its hash, keeping the directory and
+        extension of the given name
+        :param name:
+        :param content:
+        :param max_length:
+        :return: stored name
+        """
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        digest = content_digest(content)
+        name = os.path.join(directory, digest[:2], f'{digest}{extension}')
+        if self.lock_names and connection.in_atomic_block:
+            lock_stored_file(name)
+        if self.exists(name):
+            return name
+
+        return super().save(name, content, max_length=max_length)
+
+
+content_storage = ContentAddressedStorage(lock_names=True)
+variant_storage = FileSystemStorage()
+
+
+def band_image_storage():
+    """
+    Return the storage for band images selected by BAND_IMAGE_STORAGE
+    :return: Storage
+    """
+    if settings.BAND_IMAGE_STORAGE == 'content':
+        return content_storage
+
+    return default_storage
+
+
+def band_variant_storage():
+    """
+    Return the storage for the derived variants of band images.
+    With content named images, variants are named after the digest of
+    their image, so bands sharing an image share its variants and they
+    are released together with the image, under its lock.
+    :return: Storage
+    """
+    if settings.BAND_IMAGE_STORAGE == 'content':
+        return variant_storage
+
+    return default_storage
@@ -0,0 +1,94 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from core.budget import iter_routes, view_budget
+
+
+@override_settings(QUERY_BUDGET='raise')
+class QueryScalingTestCase(TestCase):
+    """
+    Base test case requesting every route of a urlconf at growing data
+    sizes and checking the query count stays flat and within the budget
+    of the view.
+
+    Subclasses set `urlconf`, `namespace` and `scenarios`, a list of
+    (route name, HTTP method, prepare method name). Before each size the
+    data is cleared with `reset()`; the prepare method then seeds `size`
+    rows and returns the keyword arguments of the client request.
+    """
+    urlconf = None
+    namespace = None
+    scenarios = ()
+    sizes = (1, 100, 1000)
+
+    def reset(self):
+        """Delete the data seeded by the scenarios"""
+
+    def test_every_route_covered(self):
+        """
+        Test every route of the urlconf has a scaling scenario
+        :return:
+        """
+        routes = {name for name, _ in iter_routes(self.urlconf,
+                                                  self.namespace)}
+        covered = {route for route, _, _ in self.scenarios}
+
+        self.assertEqual(routes - covered, set())
+
+    def test_query_count_flat(self):
+        """
+        Test no route runs more queries as the data grows
+        :return:
+        """
+        for route, method, prepare in self.scenarios:
+            with self.subTest(route=route, method=method):
+                counts = {}
+                for size in self.sizes:
+                    self.reset()
+                    request = getattr(self, prepare)(size)
+                    counts[size] = self.count_queries(method, request)
+
+                self.assertEqual(len(set(counts.values())), 1,
+                                 f'query count grows with data: {counts}')
+                budget = self.budget(method, request['path'])
+                self.assertIsNotNone(budget, f'no query budget: {counts}')
+                self.assertLessEqual(max(counts.values()), budget)
+
+    def batch_size(self, size, fields):
+        """
+        Return how many of size rows a bulk request should carry.
+        SQLite caps the parameters of a query, so Django splits bulk inserts
+        over the cap into several queries; payloads are kept to one batch.
+        :param size:
+        :param fields: number of fields inserted per row
+        :return: int
+        """
+        limit = connection.features.max_query_params
+        return min(size, limit // fields) if limit else size
+
+    def count_queries(self, method, request):
+        """
+        Send a request with cold caches and return its query count
+        :param method: HTTP method
+        :param request: client keyword arguments
+        :return: int
+        """
+        for cache in caches.all():
+            cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            res = getattr(self.client, method.lower())(**request)
+            if res.streaming:
+                b''.join(res.streaming_content)
+
+        self.assertLess(res.status_code, 400, getattr(res, 'data', res))
+        return len(queries)
+
+    def budget(self, method, path):
+        """Return the query budget of the view serving a path"""
+        view = resolve(path).func
+        actions = getattr(view, 'actions', None) or {}
+        return view_budget(view.cls, actions.get(method.lower()), method)
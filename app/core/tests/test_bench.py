@@ -0,0 +1,81 @@
+import io
+import json
+import os
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from core.bench import compare, time_case
+from core.models import Band
+
+
+def result(name, size, median):
+    return {'name': name, 'size': size, 'median_ms': median}
+
+
+class BenchHelperTests(SimpleTestCase):
+
+    def test_time_case_per_call(self):
+        """Test timings are reported per call of the case"""
+        timing = time_case(lambda: time.sleep(0.01), repeat=2)
+
+        self.assertGreater(timing['loops'], 1)
+        self.assertGreaterEqual(timing['min_ms'], 10)
+        self.assertLess(timing['median_ms'], 100)
+
+    def test_compare_threshold(self):
+        """Test only cases slower than the threshold regress"""
+        baseline = [result('a', 10, 1.0), result('b', 10, 1.0),
+                    result('a', 100, 10.0)]
+        results = [result('a', 10, 1.1), result('b', 10, 1.5),
+                   result('a', 100, 9.0)]
+
+        regressions = compare(results, baseline, threshold=0.2)
+
+        self.assertEqual([(name, size) for name, size, *_ in regressions],
+                         [('b', 10)])
+        self.assertAlmostEqual(regressions[0][4], 1.5)
+
+    def test_compare_skips_new_cases(self):
+        """Test cases missing from the baseline are not regressions"""
+        self.assertEqual(compare([result('a', 10, 5.0)], []), [])
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.output = os.path.join(self.dir.name, 'bench.json')
+
+    def run_command(self, **options):
+        call_command('benchmark', in_place=True, sizes='1,3', repeat=1,
+                     only='rockband.serializer.tag', output=self.output,
+                     stderr=io.StringIO(), **options)
+        with open(self.output) as f:
+            return json.load(f)
+
+    def test_results_written_as_json(self):
+        """Test every selected case is reported at every size"""
+        report = self.run_command()
+
+        self.assertEqual(report['meta']['sizes'], [1, 3])
+        self.assertEqual(
+            [(row['name'], row['size']) for row in report['results']],
+            [('rockband.serializer.tag', 1), ('rockband.serializer.tag', 3)]
+        )
+        self.assertFalse(Band.objects.exists())
+
+    def test_regression_against_baseline(self):
+        """Test the command fails when a case is slower than the baseline"""
+        baseline = os.path.join(self.dir.name, 'baseline.json')
+        with open(baseline, 'w') as f:
+            json.dump({'results': [
+                result('rockband.serializer.tag', 1, 1e-9),
+            ]}, f)
+
+        with self.assertRaisesMessage(CommandError, '1 benchmarks regressed'):
+            self.run_command(baseline=baseline)
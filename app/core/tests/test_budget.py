@@ -0,0 +1,79 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.budget import QueryBudgetExceeded, iter_routes, query_budget, \
+    view_budget
+from core.metrics import RequestTimings
+from core.middleware import QueryBudgetMiddleware
+
+
+class SampleViewSet(viewsets.ViewSet):
+    query_budgets = {'list': 2}
+
+    def list(self, request):
+        return Response()
+
+    @action(methods=['GET'], detail=False)
+    @query_budget(5)
+    def report(self, request):
+        return Response()
+
+
+class SampleView(APIView):
+    query_budgets = {'get': 1}
+
+
+class ViewBudgetTests(SimpleTestCase):
+
+    def test_budget_from_class_attribute(self):
+        """Test budgets are looked up by action or HTTP method"""
+        self.assertEqual(view_budget(SampleViewSet, 'list', 'GET'), 2)
+        self.assertEqual(view_budget(SampleView, None, 'GET'), 1)
+
+    def test_budget_from_decorator(self):
+        """Test @query_budget sets the budget of an extra action"""
+        self.assertEqual(view_budget(SampleViewSet, 'report', 'GET'), 5)
+
+    def test_missing_budget(self):
+        """Test views without a budget return None"""
+        self.assertIsNone(view_budget(SampleView, None, 'POST'))
+
+    def test_iter_routes_namespaced(self):
+        """Test routes of included urlconfs carry their namespace"""
+        names = {name for name, _ in iter_routes()}
+
+        self.assertIn('rockband:band-list', names)
+        self.assertIn('user:me', names)
+
+
+class QueryBudgetMiddlewareTests(SimpleTestCase):
+
+    def run_request(self, queries):
+        request = RequestFactory().get('/')
+        request.timings = RequestTimings()
+        request.timings.db_count = queries
+        middleware = QueryBudgetMiddleware(lambda request: Response())
+        middleware.process_view(request, SampleView.as_view(), (), {})
+        return middleware.process_response(request, Response())
+
+    @override_settings(QUERY_BUDGET='raise')
+    def test_over_budget_raises(self):
+        """Test a request over its budget fails in raise mode"""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.run_request(2)
+
+        self.run_request(1)
+
+    @override_settings(QUERY_BUDGET='warn')
+    def test_over_budget_warns(self):
+        """Test a request over its budget is logged in warn mode"""
+        with self.assertLogs('core.middleware', 'WARNING'):
+            self.run_request(2)
+
+    @override_settings(QUERY_BUDGET='off')
+    def test_off(self):
+        """Test no check is done when budgets are off"""
+        self.run_request(2)
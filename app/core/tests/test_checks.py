@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_shared_caches
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+MEMCACHED = 'django.core.cache.backends.memcached.PyMemcacheCache'
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {'BACKEND': LOCMEM},
+                               'shared': {'BACKEND': MEMCACHED}},
+                       AUTH_TOKEN_CACHE_ALIAS='default',
+                       RESPONSE_CACHE_ALIAS='shared')
+    def test_process_local_cache(self):
+        """Test a process local auth cache is an error"""
+        errors = check_shared_caches(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        self.assertIn('default', errors[0].msg)
+
+    @override_settings(CACHES={'default': {'BACKEND': MEMCACHED}})
+    def test_shared_cache(self):
+        """Test shared caches pass"""
+        self.assertEqual(check_shared_caches(None), [])
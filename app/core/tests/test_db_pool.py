@@ -0,0 +1,198 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.db.backends.postgresql import base as postgresql
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from psycopg2 import extensions
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.backends.postgresql.base import DatabaseWrapper
+from core.db.pool import ConnectionPool, PoolTimeout, get_pool, pool_stats
+
+POOLS_URL = reverse('db-pools')
+
+
+class FakeConnection:
+    """Stand-in for a raw database connection"""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_idle_connection_reused(self):
+        """Test a returned connection is handed out again"""
+        pool = ConnectionPool(size=2)
+        connection = pool.acquire(FakeConnection)
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(FakeConnection), connection)
+        self.assertEqual(pool.stats()['checked_out'], 1)
+
+    def test_overflow_closed_on_release(self):
+        """Test connections beyond the pool size are not kept"""
+        pool = ConnectionPool(size=1, max_overflow=1)
+        first = pool.acquire(FakeConnection)
+        second = pool.acquire(FakeConnection)
+        self.assertEqual(pool.stats()['overflow'], 1)
+
+        pool.release(first)
+        pool.release(second)
+
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_exhausted_pool_times_out(self):
+        """Test acquiring from an exhausted pool raises after the timeout"""
+        pool = ConnectionPool(size=1, timeout=0.01)
+        pool.acquire(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waiter_gets_released_connection(self):
+        """Test a waiting caller gets the connection another returns"""
+        pool = ConnectionPool(size=1, timeout=5)
+        connection = pool.acquire(FakeConnection)
+        timer = threading.Timer(0.05, pool.release, [connection])
+        timer.start()
+
+        self.assertIs(pool.acquire(FakeConnection), connection)
+        timer.join()
+        self.assertEqual(pool.stats()['waits'], 1)
+
+    def test_failed_check_replaces_connection(self):
+        """Test an idle connection failing the check is replaced"""
+        pool = ConnectionPool(size=1)
+        stale = pool.acquire(FakeConnection)
+        pool.release(stale)
+
+        fresh = pool.acquire(FakeConnection, check=lambda conn: False)
+
+        self.assertIsNot(fresh, stale)
+        self.assertTrue(stale.closed)
+        self.assertEqual(pool.stats()['checked_out'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failing connect does not leak a pool slot"""
+        pool = ConnectionPool(size=1)
+
+        with self.assertRaises(ValueError):
+            pool.acquire(MagicMock(side_effect=ValueError))
+
+        self.assertEqual(pool.stats()['checked_out'], 0)
+
+
+class PooledBackendTests(SimpleTestCase):
+
+    def make_wrapper(self, size=1, timeout=30):
+        settings_dict = {
+            'NAME': 'rockband',
+            'USER': '',
+            'PASSWORD': '',
+            'HOST': '',
+            'PORT': '',
+            'OPTIONS': {},
+            'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+            'POOL': {'SIZE': size, 'MAX_OVERFLOW': 0, 'TIMEOUT': timeout},
+            'TIME_ZONE': None,
+        }
+        return DatabaseWrapper(settings_dict, alias=self.id())
+
+    def raw_connection(self):
+        connection = MagicMock(closed=False)
+        connection.get_transaction_status.return_value = \
+            extensions.TRANSACTION_STATUS_IDLE
+        return connection
+
+    @patch.object(postgresql.DatabaseWrapper, 'get_new_connection')
+    def test_close_returns_connection_to_pool(self, connect):
+        """Test closing a pooled connection keeps it for the next use"""
+        raw = self.raw_connection()
+        connect.return_value = raw
+        wrapper = self.make_wrapper()
+
+        wrapper.connection = wrapper.get_new_connection({'dbname': 'a'})
+        wrapper.close()
+        reused = wrapper.get_new_connection({'dbname': 'a'})
+
+        self.assertIs(reused, raw)
+        self.assertEqual(connect.call_count, 1)
+        raw.close.assert_not_called()
+
+    @patch.object(postgresql.DatabaseWrapper, 'get_new_connection')
+    def test_open_transaction_rolled_back(self, connect):
+        """Test a connection is rolled back before it is pooled"""
+        raw = self.raw_connection()
+        raw.get_transaction_status.return_value = \
+            extensions.TRANSACTION_STATUS_INTRANS
+        connect.return_value = raw
+        wrapper = self.make_wrapper()
+
+        wrapper.connection = wrapper.get_new_connection({'dbname': 'b'})
+        wrapper.close()
+
+        raw.rollback.assert_called_once()
+        self.assertEqual(wrapper.get_pool({'dbname': 'b'}).stats()['idle'], 1)
+
+    @patch.object(postgresql.DatabaseWrapper, 'get_new_connection')
+    def test_pool_timeout_is_operational_error(self, connect):
+        """Test an exhausted pool surfaces as a database error"""
+        connect.return_value = self.raw_connection()
+        wrapper = self.make_wrapper(timeout=0.01)
+        wrapper.get_new_connection({'dbname': 'c'})
+
+        with self.assertRaises(OperationalError):
+            with wrapper.wrap_database_errors:
+                wrapper.get_new_connection({'dbname': 'c'})
+
+    def test_pool_disabled_without_size(self):
+        """Test no pool is used when the size is zero"""
+        wrapper = self.make_wrapper(size=0)
+
+        self.assertIsNone(wrapper.get_pool({'dbname': 'd'}))
+
+
+class DatabasePoolsViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_sees_pool_stats(self):
+        """Test staff users get the pool utilization"""
+        user = get_user_model().objects.create_superuser(
+            'admin@rockbanddev.com',
+            'password123'
+        )
+        self.client.force_authenticate(user)
+        get_pool('stats-view', 'key', 3, 1, 30)
+
+        res = self.client.get(POOLS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['stats-view']['size'], 3)
+        self.assertEqual(res.data, pool_stats())
+
+    def test_non_staff_forbidden(self):
+        """Test regular users cannot see the pool stats"""
+        user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'password123'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(POOLS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,121 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.health import _readiness_state, run_checks
+
+LIVE_URL = reverse('health-live')
+READY_URL = reverse('health-ready')
+
+
+def failing_check():
+    raise RuntimeError('broken')
+
+
+def slow_check():
+    time.sleep(0.5)
+
+
+class RunChecksTests(TransactionTestCase):
+
+    def test_results_per_check(self):
+        """Test passing and failing checks are reported separately"""
+        results = run_checks({'ok': lambda: None, 'bad': failing_check}, 1)
+
+        self.assertTrue(results['ok']['ok'])
+        self.assertIn('duration_ms', results['ok'])
+        self.assertEqual(results['bad'], {'ok': False, 'error': 'broken'})
+
+    def test_checks_run_concurrently(self):
+        """Test slow checks do not add up"""
+        start = time.monotonic()
+        run_checks({name: slow_check for name in 'abc'}, 5)
+
+        self.assertLess(time.monotonic() - start, 1.2)
+
+    def test_slow_check_times_out(self):
+        """Test a check exceeding the timeout is reported as failed"""
+        results = run_checks({'slow': slow_check}, 0.05)
+
+        self.assertEqual(results['slow'], {'ok': False, 'error': 'timeout'})
+
+    def test_hung_check_not_restarted(self):
+        """Test a check still running from a previous probe is not rerun"""
+        release = threading.Event()
+        calls = []
+
+        def hung_check():
+            calls.append(1)
+            release.wait(5)
+
+        first = run_checks({'hung': hung_check}, 0.05)
+        second = run_checks({'hung': hung_check}, 0.05)
+        release.set()
+        time.sleep(0.1)
+        third = run_checks({'hung': hung_check}, 1)
+
+        self.assertEqual(first['hung'], {'ok': False, 'error': 'timeout'})
+        self.assertEqual(second['hung'], {'ok': False, 'error': 'timeout'})
+        self.assertTrue(third['hung']['ok'])
+        self.assertEqual(len(calls), 2)
+
+
+class HealthEndpointTests(TransactionTestCase):
+
+    def setUp(self):
+        _readiness_state.update(pid=None, expires=0.0, result=None)
+
+    def test_live(self):
+        """Test the liveness probe answers without checks"""
+        with self.assertNumQueries(0):
+            res = self.client.get(LIVE_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_ready(self):
+        """Test the readiness probe passes with a migrated database"""
+        res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(res.json()['checks']),
+                         {'database', 'media', 'migrations'})
+        self.assertIn('no-cache', res['Cache-Control'])
+
+    def test_ready_result_cached(self):
+        """Test repeated probes reuse the cached result"""
+        with patch('core.health.run_checks', wraps=run_checks) as rc:
+            self.client.get(READY_URL)
+            self.client.get(READY_URL)
+
+        self.assertEqual(rc.call_count, 1)
+
+    def test_ready_result_per_process(self):
+        """Test another process runs its own checks"""
+        self.client.get(READY_URL)
+        with patch('core.health.run_checks', wraps=run_checks) as rc, \
+                patch('core.health.os.getpid', return_value=-1):
+            self.client.get(READY_URL)
+
+        self.assertEqual(rc.call_count, 1)
+
+    @override_settings(HEALTH_CACHE_TIMEOUT=0)
+    def test_ready_result_expires(self):
+        """Test the checks run again once the cached result expired"""
+        with patch('core.health.run_checks', wraps=run_checks) as rc:
+            self.client.get(READY_URL)
+            self.client.get(READY_URL)
+
+        self.assertEqual(rc.call_count, 2)
+
+    @override_settings(MEDIA_ROOT='/nonexistent/media')
+    def test_not_ready(self):
+        """Test the readiness probe fails when a check fails"""
+        res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['status'], 'unavailable')
+        self.assertFalse(res.json()['checks']['media']['ok'])
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Band, Member, Tag
+
+
+class IndexUsageTests(TestCase):
+    """Test the per-user access paths use the composite indexes"""
+
+    users = 20
+    rows_per_user = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            get_user_model().objects.create_user(
+                f'user{i}@rockbanddev.com', 'testpass'
+            )
+            for i in range(cls.users)
+        ]
+        for model in (Tag, Member):
+            model.objects.bulk_create([
+                model(user=user, name=f'Name {i}')
+                for user in users for i in range(cls.rows_per_user)
+            ])
+        Band.objects.bulk_create([
+            Band(user=user, title=f'Band {i}', band_members=4, tickets=10)
+            for user in users for i in range(cls.rows_per_user)
+        ])
+        tags = Tag.objects.values_list('user_id', 'id')
+        bands = dict(Band.objects.values_list('user_id', 'id'))
+        Band.tags.through.objects.bulk_create([
+            Band.tags.through(band_id=bands[user_id], tag_id=tag_id)
+            for user_id, tag_id in tags
+        ])
+        members = Member.objects.values_list('user_id', 'id')
+        Band.members.through.objects.bulk_create([
+            Band.members.through(band_id=bands[user_id], member_id=member_id)
+            for user_id, member_id in members
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user = users[0]
+
+    def setUp(self):
+        # A few thousand rows fit in a handful of pages, where Postgres
+        # may prefer a sequential scan over any index
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+            self.addCleanup(self.reset_seqscan)
+
+    def reset_seqscan(self):
+        """Let the Postgres planner use sequential scans again"""
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_seqscan')
+
+    def assertUsesIndex(self, queryset, index):
+        """Assert the query plan of the queryset uses the index"""
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+
+    def test_tags_by_user_and_name(self):
+        """Test listing a user's tags uses the (user, name) index"""
+        queryset = Tag.objects.filter(user=self.user).order_by('-name')
+
+        self.assertUsesIndex(queryset, 'core_tag_user_name_idx')
+
+    def test_members_by_user_and_name(self):
+        """Test listing a user's members uses the (user, name) index"""
+        queryset = Member.objects.filter(user=self.user).order_by('-name')
+
+        self.assertUsesIndex(queryset, 'core_member_user_name_idx')
+
+    def test_bands_by_user_and_id(self):
+        """Test paging a user's bands uses the (user, id) index"""
+        queryset = Band.objects.filter(user=self.user, id__lt=10**9)\
+            .order_by('-id')
+
+        self.assertUsesIndex(queryset, 'core_band_user_id_idx')
+
+    def test_assigned_tags(self):
+        """Test joining tags to bands uses the (tag, band) index"""
+        queryset = Tag.objects.filter(user=self.user, band__isnull=False)
+
+        self.assertUsesIndex(queryset, 'core_band_tags_tag_band_idx')
+
+    def test_assigned_members(self):
+        """Test joining members to bands uses the (member, band) index"""
+        queryset = Member.objects.filter(user=self.user, band__isnull=False)
+
+        self.assertUsesIndex(queryset, 'core_band_members_member_band_idx')
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+CONTENT_NAME = f'{"ab" * 32}.jpg'
+VARIANT_NAME = f'{"ab" * 32}_small.webp'
+
+
+def media_url(path):
+    """Return the url that serves a media file"""
+    return reverse('media', args=[path])
+
+
+class ServeMediaTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.content = bytes(range(256)) * 4
+        os.makedirs(os.path.join(self.media_root, 'uploads/band'))
+        for name in ('photo.jpg', CONTENT_NAME, VARIANT_NAME):
+            with open(os.path.join(self.media_root, 'uploads/band', name),
+                      'wb') as f:
+                f.write(self.content)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_serve_file(self):
+        """Test serving a file with validators and cache headers"""
+        res = self.client.get(media_url('uploads/band/photo.jpg'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), self.content)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+        self.assertNotIn('immutable', res['Cache-Control'])
+
+    def test_content_named_file_immutable(self):
+        """Test content-named files are cached forever"""
+        res = self.client.get(media_url(f'uploads/band/{CONTENT_NAME}'))
+
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_content_named_variant_immutable(self):
+        """Test variants named after a content-named file are cached forever"""
+        res = self.client.get(media_url(f'uploads/band/{VARIANT_NAME}'))
+
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_not_modified(self):
+        """Test a matching ETag returns 304"""
+        url = media_url('uploads/band/photo.jpg')
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_byte_range(self):
+        """Test a byte range request returns partial content"""
+        res = self.client.get(media_url('uploads/band/photo.jpg'),
+                              HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content),
+                         self.content[10:20])
+        self.assertEqual(res['Content-Range'],
+                         f'bytes 10-19/{len(self.content)}')
+
+    def test_suffix_byte_range(self):
+        """Test a suffix range returns the end of the file"""
+        res = self.client.get(media_url('uploads/band/photo.jpg'),
+                              HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content),
+                         self.content[-5:])
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file returns 416"""
+        res = self.client.get(media_url('uploads/band/photo.jpg'),
+                              HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(res.status_code, 416)
+
+    def test_stale_if_range_served_in_full(self):
+        """Test a range with an outdated If-Range returns the full file"""
+        res = self.client.get(media_url('uploads/band/photo.jpg'),
+                              HTTP_RANGE='bytes=0-9',
+                              HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect')
+    def test_accel_redirect(self):
+        """Test the body is offloaded to nginx when configured"""
+        res = self.client.get(media_url('uploads/band/photo.jpg'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['X-Accel-Redirect'],
+                         '/protected-media/uploads/band/photo.jpg')
+        self.assertEqual(res.content, b'')
+
+    def test_missing_file(self):
+        """Test a missing file returns 404"""
+        res = self.client.get(media_url('uploads/band/missing.jpg'))
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_path_traversal(self):
+        """Test paths outside the media root are not served"""
+        res = self.client.get(media_url('../../etc/passwd'))
+
+        self.assertEqual(res.status_code, 404)
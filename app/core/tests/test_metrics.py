@@ -0,0 +1,202 @@
+import re
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.metrics import MetricsRegistry, RequestTimings, registry
+from core.models import Band
+
+BAND_URL = reverse('rockband:band-list')
+METRICS_URL = reverse('metrics')
+
+
+def server_timing(response):
+    """Return the Server-Timing metrics of a response as a dict"""
+    timings = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        timings[name] = dict(param.split('=', 1) for param in params)
+
+    return timings
+
+
+class MetricsRegistryTests(SimpleTestCase):
+
+    def test_histogram_buckets_cumulative(self):
+        """Test bucket counts include every faster request"""
+        metrics = MetricsRegistry(buckets=(0.1, 1.0))
+        for duration in (0.05, 0.5, 0.5, 5):
+            metrics.observe('app:view', 'GET', 200, duration,
+                            RequestTimings())
+
+        text = metrics.render()
+
+        labels = 'route="app:view",method="GET"'
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1',
+            text
+        )
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{labels},le="1.0"}} 3',
+            text
+        )
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4',
+            text
+        )
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 4',
+                      text)
+        self.assertIn(
+            f'http_requests_total{{{labels},status="200"}} 4', text
+        )
+
+    def test_collector_families_rendered(self):
+        """Test registered collectors are added to the output"""
+        metrics = MetricsRegistry()
+        metrics.register_collector(lambda: [
+            ('queue_depth', 'gauge', 'Queued tasks', [('', {}, 3)]),
+        ])
+
+        text = metrics.render()
+
+        self.assertIn('# TYPE queue_depth gauge\nqueue_depth 3\n', text)
+
+
+class SharedMetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.workers = {}
+        for pid in (101, 102):
+            metrics = MetricsRegistry(buckets=(1.0,))
+            metrics.share(directory)
+            metrics.register_collector(lambda: [
+                ('pool_idle', 'gauge', 'Idle connections', [('', {}, 2)]),
+            ])
+            self.workers[pid] = metrics
+
+    def observe(self, pid, requests):
+        """Record requests in the registry of a worker"""
+        with patch('core.metrics.os.getpid', return_value=pid):
+            for _ in range(requests):
+                self.workers[pid].observe('app:view', 'GET', 200, 0.5,
+                                          RequestTimings())
+            self.workers[pid].flush()
+
+    def render(self, pid):
+        """Return the metrics a worker answers a scrape with"""
+        with patch('core.metrics.os.getpid', return_value=pid):
+            return self.workers[pid].render()
+
+    def test_counters_added_up(self):
+        """Test any worker reports the requests of every worker"""
+        self.observe(101, 2)
+        self.observe(102, 3)
+
+        for pid in self.workers:
+            text = self.render(pid)
+            self.assertIn('http_request_duration_seconds_count'
+                          '{route="app:view",method="GET"} 5', text)
+            self.assertIn('http_requests_total'
+                          '{route="app:view",method="GET",status="200"} 5',
+                          text)
+            self.assertIn('pool_idle{pid="101"} 2', text)
+            self.assertIn('pool_idle{pid="102"} 2', text)
+
+    def test_exited_worker_counters_kept(self):
+        """Test counters do not go back once a worker exited"""
+        self.observe(101, 2)
+        self.observe(102, 3)
+
+        self.workers[101].archive_worker(102)
+        self.observe(101, 1)
+
+        text = self.render(101)
+        self.assertIn('http_request_duration_seconds_count'
+                      '{route="app:view",method="GET"} 6', text)
+        self.assertIn('pool_idle{pid="101"} 2', text)
+        self.assertNotIn('pool_idle{pid="102"}', text)
+
+
+class RequestTimingTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        Band.objects.create(user=self.user, title='Band', band_members=4,
+                            tickets=10)
+
+    def test_server_timing_header(self):
+        """Test the response reports db, serializer and render time"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(BAND_URL)
+
+        timings = server_timing(res)
+        self.assertEqual(timings['db']['desc'],
+                         f'"{len(queries)} queries"')
+        for name in ('db', 'serialize', 'render', 'total'):
+            self.assertGreater(float(timings[name]['dur']), 0)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """Test the header is left out when SERVER_TIMING is off"""
+        res = self.client.get(BAND_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_metrics_per_route(self):
+        """Test /metrics reports the requests of each route"""
+        registry.reset()
+        self.client.get(BAND_URL)
+        self.client.get(BAND_URL)
+
+        with override_settings(METRICS_TOKEN='scrape'):
+            res = self.client.get(METRICS_URL,
+                                  HTTP_AUTHORIZATION='Bearer scrape')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        labels = 'route="rockband:band-list",method="GET"'
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2',
+                      text)
+        queries = re.search(
+            rf'http_request_db_queries_total{{{labels}}} (\d+)', text
+        )
+        self.assertGreater(int(queries.group(1)), 0)
+        self.assertIn('rockband_response_cache_requests_total', text)
+
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_metrics_refused(self):
+        """Test /metrics needs an admin or the scrape token"""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 403)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer x')
+        self.assertEqual(res.status_code, 403)
+
+        self.client.logout()
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 401)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_admin(self):
+        """Test admins read /metrics without a scrape token"""
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from unittest.mock import patch
 
 from django.test import TestCase
@@ -85,6 +86,30 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(band), band.title)
 
+    def test_band_modified_on_relation_change(self):
+        """
+        Test adding a member to a band updates its modification time
+        :return:
+        """
+        user = sample_user()
+        band = models.Band.objects.create(
+            user=user,
+            title='Metallica',
+            band_members=4,
+            tickets=20.0
+        )
+        models.Band.objects.filter(id=band.id).update(
+            modified=band.modified - timedelta(days=1)
+        )
+        band.refresh_from_db()
+        previous = band.modified
+
+        member = models.Member.objects.create(user=user, name='Hetfield')
+        member.band_set.add(band)
+
+        band.refresh_from_db()
+        self.assertGreater(band.modified, previous)
+
     @patch('uuid.uuid4')
     def test_band_file_name_uuid(self, mock_uuid):
         """
@@ -0,0 +1,128 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from http.client import HTTPConnection
+from urllib.request import urlopen
+
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from core.management.commands.serve import parse_bind
+
+MANAGE_PY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'manage.py'
+)
+
+
+class ParseBindTests(SimpleTestCase):
+
+    def test_host_and_port(self):
+        """Test a HOST:PORT address is split"""
+        self.assertEqual(parse_bind('127.0.0.1:8000'), ('127.0.0.1', 8000))
+        self.assertEqual(parse_bind('[::1]:8000'), ('::1', 8000))
+        self.assertEqual(parse_bind(':8000'), ('0.0.0.0', 8000))
+
+    def test_invalid_address(self):
+        """Test an address without a port is rejected"""
+        with self.assertRaises(CommandError):
+            parse_bind('localhost')
+
+
+class ServeCommandTests(SimpleTestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.env = dict(
+            os.environ,
+            CACHE_BACKEND='django.core.cache.backends.filebased.'
+                          'FileBasedCache',
+            CACHE_LOCATION=cache_dir.name,
+        )
+
+    def start(self, *args):
+        process = subprocess.Popen(
+            [sys.executable, MANAGE_PY, 'serve', '--bind', '127.0.0.1:0',
+             '--graceful-timeout', '5', *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+            env=self.env,
+        )
+        self.addCleanup(process.kill)
+        listening = process.stdout.readline()
+        self.assertTrue(listening.startswith('Listening at'), listening)
+        port = listening.split()[2].rsplit(':', 1)[1]
+        return process, f'http://127.0.0.1:{port}/health/live/'
+
+    def stop(self, process):
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=30)
+        return output
+
+    def test_serves_requests_and_stops(self):
+        """Test workers answer requests and exit on SIGTERM"""
+        process, url = self.start('--workers', '2')
+
+        for _ in range(3):
+            with urlopen(url, timeout=10) as res:
+                self.assertEqual(res.status, 200)
+        start = time.monotonic()
+        output = self.stop(process)
+
+        self.assertEqual(process.returncode, 0)
+        self.assertIn('Stopped', output)
+        # Idle workers stop on their own, before the graceful timeout
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_workers_recycled_after_max_requests(self):
+        """Test a worker is replaced once it served max requests"""
+        process, url = self.start('--workers', '1', '--threads', '1',
+                                  '--max-requests', '2')
+
+        for _ in range(5):
+            with urlopen(url, timeout=10) as res:
+                self.assertEqual(res.status, 200)
+        output = self.stop(process)
+
+        self.assertGreaterEqual(output.count('Booted worker'), 3)
+
+    def test_keep_alive_requests_counted(self):
+        """Test every request of a keep-alive connection counts"""
+        process, url = self.start('--workers', '1', '--threads', '1',
+                                  '--max-requests', '3')
+        port = int(url.split(':')[2].split('/')[0])
+
+        connection = HTTPConnection('127.0.0.1', port, timeout=10)
+        for _ in range(2):
+            connection.request('GET', '/health/live/')
+            res = connection.getresponse()
+            res.read()
+            self.assertEqual(res.status, 200)
+            self.assertFalse(res.will_close)
+        connection.close()
+        for _ in range(2):
+            with urlopen(url, timeout=10) as res:
+                self.assertEqual(res.status, 200)
+        output = self.stop(process)
+
+        self.assertEqual(output.count('Booted worker'), 2)
+
+    def test_workers_need_shared_cache(self):
+        """Test several workers are refused with a process local cache"""
+        del self.env['CACHE_BACKEND']
+        result = subprocess.run(
+            [sys.executable, MANAGE_PY, 'serve', '--bind', '127.0.0.1:0',
+             '--workers', '2'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            env=self.env,
+            timeout=30,
+        )
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('shared cache', result.stderr)
@@ -0,0 +1,175 @@
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from core.models import Band, StoredFile
+from core.storage import ContentAddressedStorage, content_storage
+from rockband.images import process_band_image
+
+
+def sample_band(user, title='Sabaton'):
+    """Create and return a sample band"""
+    return Band.objects.create(
+        user=user,
+        title=title,
+        band_members=5,
+        tickets=29.9
+    )
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        field = Band._meta.get_field('image')
+        patcher = patch.object(field, 'storage', content_storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage = field.storage
+
+    def save_image(self, band, content=b'press photo'):
+        """Save an image with the given bytes on the band"""
+        with self.captureOnCommitCallbacks(execute=True):
+            band.image.save('photo.JPG', ContentFile(content))
+
+        return band.image.name
+
+    def test_identical_content_stored_once(self):
+        """Test saving the same bytes twice returns the same name"""
+        storage = ContentAddressedStorage()
+        first = storage.save('uploads/band/a.jpg', ContentFile(b'same'))
+        second = storage.save('uploads/band/b.jpg', ContentFile(b'same'))
+        third = storage.save('uploads/band/c.jpg', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertTrue(first.startswith('uploads/band/'))
+        self.assertTrue(first.endswith('.jpg'))
+        for name in (first, third):
+            storage.delete(name)
+
+    def test_shared_image_kept_until_unused(self):
+        """Test a shared image is only deleted with its last band"""
+        band1 = sample_band(self.user)
+        band2 = sample_band(self.user, title='Rage')
+        name = self.save_image(band1)
+        self.assertEqual(self.save_image(band2), name)
+
+        self.save_image(band1, b'new photo')
+        self.assertTrue(self.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            band2.delete()
+        self.assertFalse(self.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            band1.delete()
+        self.assertFalse(self.storage.exists(band1.image.name))
+
+    def test_replaced_image_variants_released(self):
+        """Test replacing an image deletes its derived variants"""
+        band = sample_band(self.user)
+        self.save_image(band)
+        variant = self.storage.save('uploads/band/variants/v.jpg',
+                                    ContentFile(b'variant'))
+        Band.objects.filter(id=band.id).update(
+            image_variants={'small': {'jpeg': variant}}
+        )
+        band = Band.objects.get(id=band.id)
+
+        self.save_image(band, b'new photo')
+
+        self.assertFalse(self.storage.exists(variant))
+        self.storage.delete(band.image.name)
+
+    @override_settings(BAND_IMAGE_STORAGE='content')
+    def test_identical_variants_kept_per_image(self):
+        """
+        Test images rendering to identical variants keep their own
+        variant files, released only with their own image
+        """
+        pixels = Image.new('RGB', (40, 20), 'red')
+        band1, band2 = sample_band(self.user), sample_band(self.user)
+        for band, level in ((band1, 1), (band2, 9)):
+            buffer = BytesIO()
+            pixels.save(buffer, format='PNG', compress_level=level)
+            self.save_image(band, buffer.getvalue())
+            process_band_image(band.id)
+            band.refresh_from_db()
+        variants1 = band1.image_variants['small']['jpeg']
+        variants2 = band2.image_variants['small']['jpeg']
+        self.assertNotEqual(band1.image.name, band2.image.name)
+        with self.storage.open(variants1) as f1, \
+                self.storage.open(variants2) as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            band1.delete()
+
+        self.assertFalse(self.storage.exists(variants1))
+        self.assertTrue(self.storage.exists(variants2))
+        with self.captureOnCommitCallbacks(execute=True):
+            band2.delete()
+        self.assertFalse(self.storage.exists(variants2))
+
+    @override_settings(BAND_IMAGE_STORAGE='content')
+    def test_shared_image_shares_variants(self):
+        """Test bands with the same image reuse its variant files"""
+        band1, band2 = sample_band(self.user), sample_band(self.user)
+        for band in (band1, band2):
+            buffer = BytesIO()
+            Image.new('RGB', (40, 20)).save(buffer, format='PNG')
+            self.save_image(band, buffer.getvalue())
+            process_band_image(band.id)
+            band.refresh_from_db()
+        self.assertEqual(band1.image_variants, band2.image_variants)
+        variant = band1.image_variants['small']['jpeg']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            band1.delete()
+        self.assertTrue(self.storage.exists(variant))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            band2.delete()
+        self.assertFalse(self.storage.exists(variant))
+
+    def test_save_in_transaction_locks_name(self):
+        """Test saving inside a transaction locks the stored name"""
+        band = sample_band(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                band.image.save('photo.jpg', ContentFile(b'locked'))
+
+        self.assertTrue(StoredFile.objects.filter(name=band.image.name)
+                        .exists())
+        self.storage.delete(band.image.name)
+
+    def test_deferred_image_released(self):
+        """Test replacing the image of a band loaded without it"""
+        band = sample_band(self.user)
+        name = self.save_image(band)
+        band = Band.objects.only('id', 'user').get(id=band.id)
+
+        self.save_image(band, b'new photo')
+
+        self.assertFalse(self.storage.exists(name))
+        self.storage.delete(band.image.name)
+
+    def test_deferred_save_reads_nothing(self):
+        """Test saving a band loaded without its image runs no image query"""
+        band = sample_band(self.user)
+        band = Band.objects.only('id', 'user', 'title').get(id=band.id)
+        band.title = 'Renamed'
+
+        with self.assertNumQueries(1):
+            band.save()
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+# Room for multipart boundaries and part headers around the file data
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class BoundedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream uploads to a temporary file in chunks, never into memory,
+    and abort as soon as more than UPLOAD_MAX_BYTES arrive.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """Reject requests that announce a body larger than the limit"""
+        self.max_bytes = settings.UPLOAD_MAX_BYTES
+        self.received = 0
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            raise MultiPartParserError(
+                f'Upload exceeds {self.max_bytes} bytes.'
+            )
+
+    def receive_data_chunk(self, raw_data, start):
+        """Write a chunk to disk unless the file grew past the limit"""
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.upload_interrupted()
+            raise MultiPartParserError(
+                f'Upload exceeds {self.max_bytes} bytes.'
+            )
+
+        return super().receive_data_chunk(raw_data, start)
@@ -0,0 +1,235 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, \
+    JsonResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+from rest_framework.decorators import api_view, authentication_classes, \
+    permission_classes
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.response import Response
+
+from core.authentication import CachedTokenAuthentication
+from core.db.pool import pool_stats
+from core.health import readiness
+from core.metrics import registry
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CONTENT_NAME_RE = re.compile(r'^[0-9a-f]{64}(_[a-z]+)?$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def parse_range(header, size):
+    """
+    Return the (start, end) byte positions of a single range header.
+    Multiple ranges are not supported and are answered in full.
+    :param header: value of the Range header
+    :param size: file size
+    :return: (start, end) inclusive, None to ignore the header,
+             or False when the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return False
+
+    return start, end
+
+
+def read_range(path, start, length, block_size=FileResponse.block_size):
+    """
+    Yield a byte range of a file in blocks
+    :param path:
+    :param start:
+    :param length:
+    :param block_size:
+    :return: generator of bytes
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(block_size, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def cache_control(path):
+    """
+    Return the Cache-Control value for a media file.
+    Content-named files, and the variants named after them, never change
+    and can be cached forever.
+    :param path:
+    :return: str
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if CONTENT_NAME_RE.match(stem):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+
+    return f'public, max-age={settings.MEDIA_MAX_AGE}'
+
+
+def offload(response, path, fullpath):
+    """
+    Hand the file body over to the web server when configured to
+    :param response:
+    :param path: path relative to MEDIA_ROOT
+    :param fullpath:
+    :return: response
+    """
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = \
+            f'{settings.MEDIA_ACCEL_REDIRECT_PREFIX}{path}'
+    else:
+        response['X-Sendfile'] = fullpath
+
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve an uploaded file with validators, cache headers and byte ranges.
+    Full responses use FileResponse so WSGI servers can sendfile() them;
+    with MEDIA_SENDFILE the body is offloaded to the front web server.
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+    try:
+        stat = os.stat(fullpath)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    if not os.path.isfile(fullpath):
+        raise Http404('File not found')
+
+    etag = quote_etag(f'{stat.st_size:x}-{stat.st_mtime_ns:x}')
+    last_modified = int(stat.st_mtime)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=last_modified)
+    if response is not None:
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    if settings.MEDIA_SENDFILE:
+        response = offload(HttpResponse(content_type=content_type),
+                           path, fullpath)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range == etag):
+        byte_range = parse_range(range_header, stat.st_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+    elif byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_range(fullpath, start, length),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    else:
+        response = FileResponse(open(fullpath, 'rb'),
+                                content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response[header] = value
+
+    return response
+
+
+class HasMetricsToken(BasePermission):
+    """
+    Allow requests bearing METRICS_TOKEN as `Authorization: Bearer <token>`
+    """
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        return bool(token) and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser])
+def database_pools(request):
+    """
+    Return the connection pool utilization of this process by alias
+    """
+    return Response(pool_stats())
+
+
+@never_cache
+@require_safe
+def health_live(request):
+    """
+    Liveness probe, answers as long as the process serves requests
+    """
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_safe
+def health_ready(request):
+    """
+    Readiness probe, checks the database, the media volume and pending
+    migrations and answers 503 while any of them fails
+    """
+    ready, checks = readiness()
+    return JsonResponse(
+        {'status': 'ok' if ready else 'unavailable', 'checks': checks},
+        status=200 if ready else 503
+    )
+
+
+@never_cache
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser | HasMetricsToken])
+def metrics(request):
+    """
+    Expose the request and connection pool metrics of every worker to
+    Prometheus, scraping with METRICS_TOKEN, and to admins
+    """
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4')
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class RockbandConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rockband'
+
+    def ready(self):
+        from core.metrics import registry
+        from rockband import signals  # noqa: F401
+        from rockband.cache import cache_metrics
+
+        registry.register_collector(cache_metrics)
@@ -0,0 +1,12 @@
+from django.urls import path, include
+
+from rockband.asyncviews import AsyncReadRouter
+from rockband.urls import build_router
+
+router = build_router(AsyncReadRouter)
+
+app_name = 'rockband'
+
+urlpatterns = [
+    path('', include(router.urls))
+]
@@ -0,0 +1,80 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+from rest_framework.routers import DefaultRouter
+
+from core.metrics import render_response
+
+READ_ACTIONS = ('list', 'retrieve')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _run_offloaded(view, request, args, kwargs):
+    """
+    Run a sync view in a pool thread and render its response there.
+    The pool thread owns its database connection, so it is checked before
+    and released after the view like at the edges of a WSGI request.
+    :param view:
+    :param request:
+    :param args:
+    :param kwargs:
+    :return: HttpResponse
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            render_response(response)
+
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """
+    Wrap a sync viewset view into a native async view.
+
+    Under ASGI Django runs sync views one at a time on a single thread.
+    Read requests served by the returned view are handed to the event
+    loop's thread pool instead, so concurrent reads no longer queue behind
+    each other. Writes keep running in the request thread, exactly as the
+    wrapped view would.
+    :param view: view returned by ViewSet.as_view()
+    :return: coroutine function
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await sync_to_async(_run_offloaded,
+                                       thread_sensitive=False)(
+                view, request, args, kwargs
+            )
+
+        return await sync_to_async(view, thread_sensitive=True)(
+            request, *args, **kwargs
+        )
+
+    return wrapper
+
+
+class AsyncReadRouter(DefaultRouter):
+    """
+    Router serving the list and retrieve routes through async views.
+    Only the ASGI urlconf uses it: under WSGI Django would run every
+    async view in a new event loop, so the WSGI routes stay sync.
+    Routes without a read action, such as extra actions, stay sync.
+    """
+
+    def get_urls(self):
+        urls = []
+        for url in super().get_urls():
+            actions = getattr(url.callback, 'actions', None)
+            if actions and set(actions.values()) & set(READ_ACTIONS):
+                url = URLPattern(url.pattern, async_read_view(url.callback),
+                                 url.default_args, url.name)
+            urls.append(url)
+
+        return urls
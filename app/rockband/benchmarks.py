@@ -0,0 +1,147 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from core.models import Member, Tag
+from rockband import serializers
+from rockband.seed import seed_rockband
+from rockband.views import BandViewSet, MemberViewSet, TagViewSet
+
+BAND_URL = '/api/rockband/bands/'
+
+# Filter query params; tags and members give how many seeded ids to pass
+FILTERS = {
+    'none': {},
+    'tags_any': {'tags': 2},
+    'tags_all': {'tags': 2, 'match': 'all'},
+    'members_any': {'members': 2},
+    'members_all': {'members': 2, 'match': 'all'},
+    'both_any': {'tags': 2, 'members': 2},
+    'both_all': {'tags': 2, 'members': 2, 'match': 'all'},
+}
+
+
+def prepare(size):
+    """
+    Seed a user with size bands, tags and members
+    :param size:
+    :return: dict with the 'user' and the seeded ids
+    """
+    user = get_user_model().objects.create_user(
+        f'bench-{size}@rockbanddev.com',
+        'benchpass'
+    )
+    context = seed_rockband(user, bands=size, tags=size, members=size,
+                            seed=size)
+    context['user'] = user
+
+    return context
+
+
+def _request(context, params=None):
+    """Return a DRF request for the band list sent by the seeded user"""
+    request = Request(RequestFactory().get(BAND_URL, params or {}))
+    request.user = context['user']
+
+    return request
+
+
+def _viewset(context, action, params=None, viewset_class=BandViewSet):
+    """Return a viewset set up for an action"""
+    view = viewset_class(action=action, format_kwarg=None)
+    view.request = _request(context, params)
+
+    return view
+
+
+def _serializer_case(serializer_class, action):
+    """
+    Time serializing the bands a viewset action loads, without the queries
+    """
+    def case(context):
+        view = _viewset(context, action)
+        bands = list(view.get_queryset())
+        serializer_context = {'request': view.request}
+
+        return lambda: serializer_class(
+            bands, many=True, context=serializer_context
+        ).data
+
+    return case
+
+
+def _attr_serializer_case(model, serializer_class):
+    """Time serializing every tag or member of the seeded user"""
+    def case(context):
+        rows = list(model.objects.filter(user=context['user']))
+
+        return lambda: serializer_class(rows, many=True).data
+
+    return case
+
+
+def _queryset_case(filters):
+    """
+    Time building and evaluating the band list queryset, prefetches
+    included, for a filter combination
+    """
+    def case(context):
+        params = dict(filters)
+        for relation in ('tags', 'members'):
+            if relation in params:
+                ids = context[relation][:params[relation]]
+                params[relation] = ','.join(str(pk) for pk in ids)
+        view = _viewset(context, 'list', params)
+
+        return lambda: list(view.get_queryset())
+
+    return case
+
+
+def _list_case(viewset_class, values, params=None):
+    """
+    Time the rows of a list action, queries included, through the model
+    serializer or the values serializer
+    """
+    def case(context):
+        view = _viewset(context, 'list', params, viewset_class)
+        serializer_context = view.get_serializer_context()
+        if values:
+            return lambda: view.values_serializer_class(
+                view.get_values_queryset(), context=serializer_context
+            ).data
+
+        return lambda: view.get_serializer_class()(
+            view.get_queryset(), many=True, context=serializer_context
+        ).data
+
+    return case
+
+
+LIST_VIEWSETS = {
+    'band': BandViewSet,
+    'tag': TagViewSet,
+    'member': MemberViewSet,
+}
+
+CASES = {
+    'serializer.band': _serializer_case(serializers.BandSerializer, 'list'),
+    'serializer.band_detail': _serializer_case(
+        serializers.BandDetailSerializer, 'retrieve'
+    ),
+    'serializer.tag': _attr_serializer_case(Tag, serializers.TagSerializer),
+    'serializer.member': _attr_serializer_case(
+        Member, serializers.MemberSerializer
+    ),
+}
+CASES.update({
+    f'queryset.{name}': _queryset_case(filters)
+    for name, filters in FILTERS.items()
+})
+CASES.update({
+    f'{path}.{name}': _list_case(viewset_class, path == 'values')
+    for path in ('list', 'values')
+    for name, viewset_class in LIST_VIEWSETS.items()
+})
+CASES['values.band_sparse'] = _list_case(BandViewSet, True,
+                                         {'fields': 'id,title'})
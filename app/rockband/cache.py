@@ -0,0 +1,168 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.response import Response
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def response_cache():
+    """Return the cache that holds list responses"""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'rockband:version:{user_id}'
+
+
+def _modified_key(user_id):
+    return f'rockband:modified:{user_id}'
+
+
+def user_version(user_id):
+    """
+    Return the current cache version of a user's rockband data
+    :param user_id:
+    :return: str
+    """
+    cache = response_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(user_id))
+
+    return version
+
+
+def user_modified(user_id):
+    """
+    Return the last time the rockband data of a user changed.
+    When the time is unknown it is set to now, so a lost entry can only
+    cost a cache miss, never a stale 304.
+    :param user_id:
+    :return: datetime
+    """
+    cache = response_cache()
+    cache.add(_modified_key(user_id), timezone.now(), None)
+    return cache.get(_modified_key(user_id)) or timezone.now()
+
+
+def bump_user_version(user_id):
+    """
+    Invalidate every cached response of a user and record the change time.
+    Versions are random so a recycled user id never sees old entries.
+    :param user_id:
+    :return: None
+    """
+    response_cache().set_many({
+        _version_key(user_id): uuid.uuid4().hex,
+        _modified_key(user_id): timezone.now(),
+    }, None)
+
+
+def _record(hit):
+    with _stats_lock:
+        _stats['hits' if hit else 'misses'] += 1
+
+
+def cache_stats():
+    """
+    Return the response cache hit and miss counters of this process
+    :return: dict
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def cache_metrics():
+    """
+    Return the response cache counters as metric families for core.metrics
+    :return: list
+    """
+    stats = cache_stats()
+    return [
+        ('rockband_response_cache_requests_total', 'counter',
+         'List responses looked up in the response cache',
+         [('', {'result': 'hit'}, stats['hits']),
+          ('', {'result': 'miss'}, stats['misses'])]),
+    ]
+
+
+class CachedListMixin:
+    """
+    Cache list responses per user, endpoint and normalized query params.
+
+    Entries are keyed on the user's cache version, which rockband.signals
+    bumps whenever a band, tag or member of the user changes, and on a
+    digest of the params, so clients cannot grow the keys. The version only
+    invalidates every process when RESPONSE_CACHE_ALIAS is a shared cache.
+    """
+    cache_set_params = ('tags', 'members', 'fields')
+    cache_flag_params = ('assigned_only',)
+    cache_params = ('match', 'cursor', 'page_size')
+
+    def _normalized_params(self, request):
+        """
+        Return the query params that change the response, normalized
+        :param request:
+        :return: str
+        """
+        params = request.query_params
+        normalized = []
+        for name in self.cache_set_params:
+            items = {item.strip() for item in params.get(name, '').split(',')}
+            items.discard('')
+            if items:
+                normalized.append(f'{name}={",".join(sorted(items))}')
+        for name in self.cache_flag_params:
+            value = params.get(name)
+            if value and value != '0':
+                normalized.append(f'{name}={value}')
+        for name in self.cache_params:
+            if name in params:
+                normalized.append(f'{name}={params[name]}')
+
+        return '&'.join(normalized)
+
+    def list_cache_key(self, request):
+        """
+        Return the cache key of the list response for the request
+        :param request:
+        :return: str
+        """
+        user_id = request.user.pk
+        params = self._normalized_params(request)
+        return ':'.join((
+            'rockband:list',
+            str(user_id),
+            user_version(user_id),
+            self.basename,
+            request.accepted_renderer.format,
+            hashlib.sha256(params.encode()).hexdigest(),
+        ))
+
+    def list(self, request, *args, **kwargs):
+        """
+        Return the cached list response or compute and cache it
+        :param request:
+        :return: Response
+        """
+        cache = response_cache()
+        key = self.list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _record(hit=True)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        _record(hit=False)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+
+        return response
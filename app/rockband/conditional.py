@@ -0,0 +1,134 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rest_framework.response import Response
+
+from core.models import Band
+from rockband.cache import user_modified
+
+
+def is_conditional(request):
+    """
+    Return whether the request carries a GET precondition
+    :param request:
+    :return: bool
+    """
+    return 'HTTP_IF_NONE_MATCH' in request.META or \
+        'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def make_etag(*parts):
+    """
+    Return a quoted ETag built from the given parts
+    :param parts:
+    :return: str
+    """
+    digest = hashlib.md5(
+        ':'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+class ConditionalBandMixin:
+    """
+    Answer If-None-Match/If-Modified-Since on band list and retrieve.
+
+    A detail 304 costs one query on Band.modified. List validators come
+    from the user's response cache version and its change time, which
+    every write bumps in the shared response cache, so a list request
+    runs no query for them and a 304 none at all.
+    """
+
+    def _conditional(self, request, etag, last_modified):
+        """
+        Return a 304 response if the client copy is still fresh
+        :param request:
+        :param etag:
+        :param last_modified: datetime
+        :return: response or None
+        """
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp())
+        )
+        if response is not None:
+            self._set_validators(response, etag, last_modified)
+
+        return response
+
+    def _set_validators(self, response, etag, last_modified):
+        """
+        Add ETag and Last-Modified headers to the response
+        :param response:
+        :param etag:
+        :param last_modified: datetime
+        :return: response
+        """
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+
+        return response
+
+    def list_validators(self, request):
+        """
+        Return the ETag and last modification time of the band list
+        :param request:
+        :return: (etag, datetime)
+        """
+        return (make_etag('list', self.list_cache_key(request)),
+                user_modified(request.user.pk))
+
+    def list(self, request, *args, **kwargs):
+        """
+        Return 304 when the filtered band list did not change
+        :param request:
+        :return: Response
+        """
+        etag, last_modified = self.list_validators(request)
+        response = self._conditional(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        return self._set_validators(response, etag, last_modified)
+
+    def _detail_etag(self, request, pk, last_modified):
+        return make_etag('detail', request.user.pk, pk, last_modified,
+                         request.accepted_renderer.format,
+                         request.query_params.get('fields', ''))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return 304 when the band did not change
+        :param request:
+        :return: Response
+        """
+        pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if is_conditional(request):
+            try:
+                last_modified = Band.objects.filter(
+                    user=request.user, pk=pk
+                ).values_list('modified', flat=True).first()
+            except (TypeError, ValueError):
+                last_modified = None
+            if last_modified is not None:
+                response = self._conditional(
+                    request,
+                    self._detail_etag(request, pk, last_modified),
+                    last_modified
+                )
+                if response is not None:
+                    return response
+
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        return self._set_validators(
+            response,
+            self._detail_etag(request, pk, instance.modified),
+            instance.modified
+        )
@@ -0,0 +1,111 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import connections
+
+from core.models import Band
+
+EXPORT_FIELDS = ('id', 'title', 'band_members', 'tickets', 'link',
+                 'members', 'tags')
+
+
+class Echo:
+    """
+    File-like object that returns what is written instead of buffering it
+    """
+
+    def write(self, value):
+        return value
+
+
+def _names_by_band(relation, band_ids):
+    """
+    Return a dict mapping band ids to the related object names
+    :param relation: Band.members or Band.tags
+    :param band_ids:
+    :return: dict
+    """
+    through = relation.through
+    target = relation.field.m2m_reverse_field_name()
+    names = {band_id: [] for band_id in band_ids}
+    rows = through.objects.filter(band_id__in=band_ids)\
+        .order_by(f'{target}__name')\
+        .values_list('band_id', f'{target}__name')
+    for band_id, name in rows:
+        names[band_id].append(name)
+
+    return names
+
+
+def band_rows(queryset, chunk_size=2000):
+    """
+    Yield bands as plain dicts with member and tag names.
+    Bands are read through a server side cursor and related names are
+    fetched once per chunk, so memory does not grow with the queryset.
+    Closing the generator early closes the cursor and the connection, so
+    an aborted download leaves no cursor open on a reused connection.
+    :param queryset: Band queryset
+    :param chunk_size: number of bands fetched per round trip
+    :return: generator of dicts
+    """
+    rows = queryset.values(
+        'id', 'title', 'band_members', 'tickets', 'link'
+    ).iterator(chunk_size=chunk_size)
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+
+            band_ids = [row['id'] for row in chunk]
+            members = _names_by_band(Band.members, band_ids)
+            tags = _names_by_band(Band.tags, band_ids)
+            for row in chunk:
+                row['tickets'] = str(row['tickets'])
+                row['members'] = members[row['id']]
+                row['tags'] = tags[row['id']]
+                yield row
+    except GeneratorExit:
+        rows.close()
+        connections[queryset.db].close()
+        raise
+
+
+def stream_lines(lines, rows):
+    """
+    Yield the lines of the rows and close the rows when the stream is
+    closed, before every line was sent
+    :param lines: ndjson_lines or csv_lines
+    :param rows: generator of dicts
+    :return: generator of str
+    """
+    try:
+        yield from lines(rows)
+    finally:
+        rows.close()
+
+
+def ndjson_lines(rows):
+    """
+    Yield each row as a line of JSON
+    :param rows:
+    :return: generator of str
+    """
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def csv_lines(rows):
+    """
+    Yield a CSV header followed by one line per row.
+    Member and tag names are joined with '|'.
+    :param rows:
+    :return: generator of str
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row['members'] = '|'.join(row['members'])
+        row['tags'] = '|'.join(row['tags'])
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
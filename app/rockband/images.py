@@ -0,0 +1,180 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models import Band
+from core.storage import band_variant_storage
+from rockband.cache import bump_user_version
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIRECTORY = 'uploads/band/variants/'
+
+# Longest edge in pixels of every pre-rendered size
+IMAGE_SIZES = {
+    'small': 96,
+    'medium': 480,
+    'large': 1600,
+}
+
+# Encodings from the most to the least compact, with their options
+IMAGE_FORMATS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 60}),
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True,
+                                    'progressive': True}),
+}
+
+
+def available_formats():
+    """
+    Return the variant formats the installed Pillow can encode
+    :return: list of format keys, most compact first
+    """
+    Image.init()
+    return [key for key, (pil_format, _, _) in IMAGE_FORMATS.items()
+            if pil_format in Image.SAVE]
+
+
+def preferred_format(accept, formats):
+    """
+    Return the most compact of the formats the Accept header allows.
+    JPEG is always acceptable as the fallback.
+    :param accept: value of the Accept header
+    :param formats: available format keys
+    :return: format key
+    """
+    accepted = set()
+    for part in (accept or '').split(','):
+        media_type, _, params = part.strip().partition(';')
+        quality = params.replace(' ', '')
+        try:
+            if quality.startswith('q=') and float(quality[2:]) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(media_type.strip().lower())
+
+    for key in formats:
+        if key == 'jpeg' or IMAGE_FORMATS[key][1] in accepted:
+            return key
+
+    return 'jpeg'
+
+
+def variant_path(name, size, key):
+    """
+    Return the storage path of a derived variant of an image
+    :param name: storage name of the original image
+    :param size: size name
+    :param key: format key
+    :return: str
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return os.path.join(VARIANT_DIRECTORY, f'{stem}_{size}.{key}')
+
+
+def render_variant(image, edge, key):
+    """
+    Return an image resized to fit the edge and encoded in the format
+    :param image: PIL image
+    :param edge: longest edge in pixels
+    :param key: format key
+    :return: bytes
+    """
+    pil_format, _, options = IMAGE_FORMATS[key]
+    variant = image.copy()
+    variant.thumbnail((edge, edge), Image.LANCZOS)
+    if pil_format == 'JPEG' or variant.mode not in ('RGB', 'RGBA'):
+        has_alpha = pil_format != 'JPEG' and 'A' in variant.getbands()
+        variant = variant.convert('RGBA' if has_alpha else 'RGB')
+    buffer = BytesIO()
+    variant.save(buffer, format=pil_format, **options)
+
+    return buffer.getvalue()
+
+
+def _set_image_state(band, **fields):
+    """
+    Record the image state of a band if it still has the same image.
+    Queryset updates send no signals, so the band is marked modified and
+    the cached lists of its owner are invalidated here.
+    :param band:
+    :param fields: field values to update
+    :return: None
+    """
+    updated = Band.objects.filter(pk=band.pk, image=band.image.name)\
+        .update(modified=timezone.now(), **fields)
+    if updated:
+        bump_user_version(band.user_id)
+
+
+def process_band_image(band_id):
+    """
+    Generate every size and format variant of a band image.
+    The result is only recorded if the band still has the same image.
+    :param band_id:
+    :return: None
+    """
+    band = Band.objects.filter(pk=band_id).first()
+    if band is None or not band.image:
+        return
+
+    name = band.image.name
+    _set_image_state(band, image_status=Band.IMAGE_PROCESSING)
+    try:
+        with band.image.open('rb') as image_file:
+            image = ImageOps.exif_transpose(Image.open(image_file))
+            image.load()
+
+        storage = band_variant_storage()
+        shared = settings.BAND_IMAGE_STORAGE == 'content'
+        formats = available_formats()
+        variants = {}
+        for size, edge in IMAGE_SIZES.items():
+            variants[size] = {}
+            for key in formats:
+                path = variant_path(name, size, key)
+                if storage.exists(path):
+                    if shared:
+                        # Rendered from the same content for another band
+                        variants[size][key] = path
+                        continue
+                    storage.delete(path)
+                variants[size][key] = storage.save(
+                    path, ContentFile(render_variant(image, edge, key))
+                )
+    except Exception:
+        logger.exception('Processing image of band %s failed', band_id)
+        _set_image_state(band, image_status=Band.IMAGE_FAILED)
+        return
+
+    _set_image_state(band, image_status=Band.IMAGE_READY,
+                     image_variants=variants)
+
+
+def process_stale_images(age):
+    """
+    Process again the images left pending or processing for longer than
+    age, by a worker that exited before it ran the task or crashed
+    :param age: timedelta
+    :return: ids of the processed bands
+    """
+    band_ids = list(
+        Band.objects
+        .filter(image_status__in=(Band.IMAGE_PENDING,
+                                  Band.IMAGE_PROCESSING),
+                modified__lt=timezone.now() - age)
+        .exclude(image='')
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    for band_id in band_ids:
+        process_band_image(band_id)
+
+    return band_ids
@@ -0,0 +1,147 @@
+from base64 import b64decode, b64encode
+from binascii import Error as DecodeError
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Opaque cursor pagination keyed on (user_id, id).
+
+    Pages are fetched with `id < last seen id` instead of an OFFSET, so every
+    page costs the same regardless of how deep the client goes. Pagination
+    is only applied when the client asks for it with `cursor` or
+    `page_size`, so plain list requests keep returning a bare list.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = _('Invalid cursor')
+
+    def is_requested(self, request):
+        """
+        Return whether the client asked for a paginated response
+        :param request:
+        :return: bool
+        """
+        params = request.query_params
+        return self.cursor_query_param in params or \
+            self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return a single page of the queryset, or None if not requested
+        :param queryset:
+        :param request:
+        :param view:
+        :return: list of objects or None
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.user_id = request.user.pk
+        self.page_size = self.get_page_size(request)
+
+        last_id = self.decode_cursor(request)
+        if last_id is not None:
+            queryset = queryset.filter(id__lt=last_id)
+
+        results = list(queryset.order_by('-id')[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        return self.page
+
+    def get_page_size(self, request):
+        """
+        Return the client requested page size capped at the server maximum
+        :param request:
+        :return: int
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, band_id):
+        """
+        Return an opaque cursor for the position after the given band
+        :param band_id:
+        :return: str
+        """
+        position = f'{self.user_id}:{band_id}'.encode('ascii')
+        return b64encode(position).decode('ascii')
+
+    def decode_cursor(self, request):
+        """
+        Return the last seen band id from the request cursor
+        :param request:
+        :return: int or None
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = b64decode(encoded.encode('ascii')).decode('ascii')
+            user_id, band_id = (int(part) for part in position.split(':'))
+        except (DecodeError, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if user_id != self.user_id:
+            raise NotFound(self.invalid_cursor_message)
+
+        return band_id
+
+    def get_next_link(self):
+        """
+        Return the url of the next page, or None on the last page
+        :return: str or None
+        """
+        if not self.has_next:
+            return None
+
+        last = self.page[-1]
+        last_id = last['id'] if isinstance(last, dict) else last.id
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(last_id)
+        )
+        return url
+
+    def get_paginated_response(self, data):
+        """
+        Return the page wrapped with the next page link
+        :param data:
+        :return: Response
+        """
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        """Return the OpenAPI schema of a paginated response"""
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'results': schema,
+            },
+        }
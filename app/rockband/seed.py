@@ -0,0 +1,155 @@
+import io
+import itertools
+import json
+import random
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Band, Member, Tag
+from rockband.cache import bump_user_version
+
+TAG_NAMES = ('Metal', 'Rock', 'Punk', 'Grunge', 'Blues', 'Indie', 'Folk',
+             'Jazz', 'Doom', 'Thrash', 'Glam', 'Prog', 'Shoegaze', 'Emo')
+FIRST_NAMES = ('Attila', 'Dave', 'James', 'Kirk', 'Lars', 'Cliff', 'Ozzy',
+               'Tony', 'Geezer', 'Bill', 'Angus', 'Malcolm', 'Bon', 'Brian')
+TITLE_WORDS = ('Iron', 'Black', 'Stone', 'Electric', 'Velvet', 'Silent',
+               'Burning', 'Crimson', 'Night', 'Thunder', 'Riders', 'Wolves',
+               'Machine', 'Temple', 'Kings', 'Ghosts', 'Serpents', 'Sons')
+BAND_FIELDS = ('user_id', 'title', 'band_members', 'tickets', 'link',
+               'image', 'image_status', 'image_variants', 'modified')
+
+
+def can_copy():
+    """Return whether the database loads rows with COPY"""
+    return connection.vendor == 'postgresql'
+
+
+def _batches(rows, batch_size):
+    rows = iter(rows)
+    batch = list(itertools.islice(rows, batch_size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(rows, batch_size))
+
+
+def _copy_value(value):
+    """Format a value for the text format of COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, dict):
+        value = json.dumps(value)
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t')\
+        .replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy(model, fields, rows, batch_size):
+    """Load rows into the table of a model with one COPY per batch"""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(field).column)
+                        for field in fields)
+    sql = f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN'
+    with connection.cursor() as cursor:
+        for batch in _batches(rows, batch_size):
+            data = io.StringIO(''.join(
+                '\t'.join(_copy_value(value) for value in row) + '\n'
+                for row in batch
+            ))
+            cursor.copy_expert(sql, data)
+
+
+def insert_rows(model, fields, rows, batch_size=1000, copy=None):
+    """
+    Insert rows without building them all in memory.
+    Rows go through COPY on Postgres and bulk_create elsewhere, or when
+    copy is False; either way no model signals are sent.
+    :param model:
+    :param fields: attribute names of the row values
+    :param rows: iterable of value tuples
+    :param batch_size: rows per query
+    :param copy: use COPY, by default when the database supports it
+    :return: None
+    """
+    if copy is None:
+        copy = can_copy()
+    if copy:
+        return _copy(model, fields, rows, batch_size)
+
+    for batch in _batches(rows, batch_size):
+        model.objects.bulk_create(
+            [model(**dict(zip(fields, row))) for row in batch],
+            batch_size=batch_size
+        )
+
+
+def _created_ids(model, user, count):
+    """Return the ids of the last count rows of a user, oldest first"""
+    ids = model.objects.filter(user=user).order_by('-id')\
+        .values_list('id', flat=True)[:count]
+
+    return list(reversed(ids))
+
+
+def seed_rockband(user, bands, tags, members, links=3, seed=None,
+                  batch_size=1000, copy=None):
+    """
+    Create tags, members and bands for a user with batched inserts.
+    Each band gets up to `links` random tags and members; names and
+    values are drawn from a seeded random generator, so the same arguments
+    always produce the same data.
+    :param user: owner of the created rows
+    :param bands: number of bands
+    :param tags: number of tags
+    :param members: number of members
+    :param links: tags and members per band
+    :param seed: random seed
+    :param batch_size: rows per insert query
+    :param copy: load with COPY, by default on Postgres
+    :return: dict with lists of the created 'bands', 'tags' and 'members'
+    """
+    rand = random.Random(seed)
+    now = timezone.now()
+
+    insert_rows(Tag, ('user_id', 'name'), (
+        (user.id, f'{TAG_NAMES[i % len(TAG_NAMES)]} {i}')
+        for i in range(tags)
+    ), batch_size, copy)
+    insert_rows(Member, ('user_id', 'name'), (
+        (user.id, f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {i}')
+        for i in range(members)
+    ), batch_size, copy)
+    insert_rows(Band, BAND_FIELDS, (
+        (user.id,
+         f'{rand.choice(TITLE_WORDS)} {rand.choice(TITLE_WORDS)} {i}',
+         rand.randint(1, 8),
+         Decimal(rand.randint(500, 20000)) / 100,
+         f'https://rockbanddev.com/bands/{i}',
+         None, Band.IMAGE_NONE, {}, now)
+        for i in range(bands)
+    ), batch_size, copy)
+
+    tag_ids = _created_ids(Tag, user, tags)
+    member_ids = _created_ids(Member, user, members)
+    band_ids = _created_ids(Band, user, bands)
+
+    insert_rows(Band.tags.through, ('band_id', 'tag_id'), (
+        (band_id, tag_id)
+        for band_id in band_ids
+        for tag_id in rand.sample(tag_ids, min(links, len(tag_ids)))
+    ), batch_size, copy)
+    insert_rows(Band.members.through, ('band_id', 'member_id'), (
+        (band_id, member_id)
+        for band_id in band_ids
+        for member_id in rand.sample(member_ids, min(links, len(member_ids)))
+    ), batch_size, copy)
+    bump_user_version(user.id)
+
+    return {
+        'bands': band_ids,
+        'tags': tag_ids,
+        'members': member_ids,
+    }
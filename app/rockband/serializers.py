@@ -1,9 +1,21 @@
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, transaction
+from django.db.models import IntegerField, Value
+from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
+from PIL import Image
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from core.metrics import TimedSerializerMixin
 from core.models import Tag, Member, Band
+from rockband.sparse import SparseFieldsSerializerMixin
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for tag objects"""
 
     class Meta:
@@ -12,7 +24,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for member objects
     """
@@ -23,23 +35,145 @@ class MemberSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class BandSerializer(serializers.ModelSerializer):
+class NameListSerializer(serializers.Serializer):
+    """
+    Serializer for bulk creating tags or members by name
+    """
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+def variant_urls(image_status, image_variants, request=None):
+    """
+    Return the derived variants of a band image as urls, absolute when
+    a request is given, keyed by size and then by format
+    :param image_status: Band.image_status
+    :param image_variants: Band.image_variants
+    :param request:
+    :return: dict
+    """
+    if image_status != Band.IMAGE_READY:
+        return {}
+
+    storage = Band._meta.get_field('image').storage
+    variants = {}
+    for size, formats in image_variants.items():
+        variants[size] = {}
+        for key, name in formats.items():
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            variants[size][key] = url
+
+    return variants
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Serialize the derived variants of a band image as absolute urls,
+    keyed by size and then by format
+    """
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, band):
+        return variant_urls(band.image_status, band.image_variants,
+                            self.context.get('request'))
+
+
+BAND_RELATIONS = ('members', 'tags')
+
+# Band columns read by serializer fields not named after one column
+BAND_FIELD_COLUMNS = {
+    'members': (),
+    'tags': (),
+    'image_variants': ('image_status', 'image_variants'),
+}
+
+
+def band_columns(fields):
+    """
+    Return the band columns serializing the given fields reads
+    :param fields: serializer field names
+    :return: tuple, the id first
+    """
+    columns = ['id']
+    for name in fields:
+        columns.extend(BAND_FIELD_COLUMNS.get(name, (name,)))
+
+    return tuple(dict.fromkeys(columns))
+
+
+class PrimaryKeyListField(serializers.ManyRelatedField):
+    """
+    List of primary keys resolved with one query for the whole list
+    instead of one query per key
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(pk_field.to_python(item))
+            except (DjangoValidationError, TypeError, ValueError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        objects = queryset.in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key relation validating many=True lists in one query
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return PrimaryKeyListField(**list_kwargs)
+
+
+class BandSerializer(SparseFieldsSerializerMixin, TimedSerializerMixin,
+                     serializers.ModelSerializer):
     """
     Serialize a band
     """
-    members = serializers.PrimaryKeyRelatedField(
+    members = BulkPrimaryKeyRelatedField(
         many=True,
         queryset=Member.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Band
         fields = ('id', 'title', 'members', 'tags', 'band_members',
-                  'tickets', 'link'
+                  'tickets', 'link', 'image_variants'
                   )
         read_only_fields = ('id',)
 
@@ -51,13 +185,387 @@ class BandDetailSerializer(BandSerializer):
     members = MemberSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
 
+    class Meta(BandSerializer.Meta):
+        fields = BandSerializer.Meta.fields + ('image', 'image_status')
+        read_only_fields = ('id', 'image', 'image_status')
+
+
+class ValuesListSerializer:
+    """
+    Read only serializer of rows fetched with values().
+
+    Lists of rows are turned into plain dicts without building model
+    instances or serializer fields per row, for list actions where that
+    is most of the work. Subclasses set `values`, the columns fetched, and
+    override `serialize_rows` to return the same output as the model
+    serializer they stand in for.
+    """
+    values = ()
+
+    def __init__(self, instance, context=None):
+        self.instance = instance
+        self.context = context or {}
+
+    @classmethod
+    def get_values(cls, fields=None):
+        """
+        Return the columns to fetch for the requested fields
+        :param fields: requested field names, None for all
+        :return: tuple
+        """
+        return cls.values
+
+    @property
+    def data(self):
+        return self.to_representation(self.instance)
+
+    def to_representation(self, rows):
+        return self.serialize_rows(rows)
 
-class BandImageSerializer(serializers.ModelSerializer):
+    def serialize_rows(self, rows):
+        """
+        Return the rows as a list of dicts
+        :param rows: iterable of values() dicts
+        :return: list
+        """
+        return [dict(row) for row in rows]
+
+
+class TagValuesSerializer(TimedSerializerMixin, ValuesListSerializer):
+    """
+    Serialize tag rows like TagSerializer
+    """
+    values = TagSerializer.Meta.fields
+
+
+class MemberValuesSerializer(TimedSerializerMixin, ValuesListSerializer):
+    """
+    Serialize member rows like MemberSerializer
+    """
+    values = MemberSerializer.Meta.fields
+
+
+def related_ids(band_ids, relations=('members', 'tags')):
+    """
+    Return the related ids of bands from one query over the through
+    tables of the relations, each list ordered by id
+    :param band_ids:
+    :param relations: names of Band many to many fields
+    :return: dict of relation to a dict of band id to related ids
+    """
+    related = {relation: {band_id: [] for band_id in band_ids}
+               for relation in relations}
+    if not band_ids or not relations:
+        return related
+
+    querysets, targets = [], []
+    for index, relation in enumerate(relations):
+        descriptor = getattr(Band, relation)
+        targets.append(f'{descriptor.field.m2m_reverse_field_name()}_id')
+        querysets.append(
+            descriptor.through.objects.filter(band_id__in=band_ids)
+            .annotate(relation=Value(index, output_field=IntegerField()))
+            .values_list('band_id', targets[-1], 'relation')
+        )
+    first, *others = querysets
+    rows = first.union(*others, all=True) if others else first
+    # A union is ordered by the column names of its first query
+    for band_id, related_id, index in rows.order_by(targets[0]):
+        related[relations[index]][band_id].append(related_id)
+
+    return related
+
+
+class BandValuesSerializer(TimedSerializerMixin, ValuesListSerializer):
+    """
+    Serialize band rows like BandSerializer, or like it would with the
+    `fields` context entry when only some fields are requested
+    """
+    values = ('id', 'title', 'band_members', 'tickets', 'link',
+              'image_status', 'image_variants')
+    tickets = serializers.DecimalField(
+        max_digits=Band._meta.get_field('tickets').max_digits,
+        decimal_places=Band._meta.get_field('tickets').decimal_places
+    )
+
+    @classmethod
+    def get_values(cls, fields=None):
+        if not fields:
+            return cls.values
+
+        return band_columns(fields)
+
+    def serialize_rows(self, rows):
+        fields = self.context.get('fields') or BandSerializer.Meta.fields
+        rows = list(rows)
+        related = related_ids(
+            [row['id'] for row in rows],
+            tuple(name for name in BAND_RELATIONS if name in fields)
+        )
+        request = self.context.get('request')
+        tickets = self.tickets.to_representation
+
+        getters = {
+            'members': lambda row: related['members'][row['id']],
+            'tags': lambda row: related['tags'][row['id']],
+            'tickets': lambda row: tickets(row['tickets']),
+            'image_variants': lambda row: variant_urls(
+                row['image_status'], row['image_variants'], request
+            ),
+        }
+        getters = [(name, getters.get(name, itemgetter(name)))
+                   for name in fields]
+
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+
+class BandBulkListSerializer(serializers.ListSerializer):
+    """
+    Validate and save a batch of bands with a fixed number of queries
+    """
+    relations = ('members', 'tags')
+
+    def to_internal_value(self, data):
+        """
+        Validate every item, then check all referenced ids at once.
+        Ids repeated within an item's relation are kept once, so each
+        through row is inserted a single time.
+        :param data:
+        :return: list of validated items
+        """
+        items = super().to_internal_value(data)
+        for item in items:
+            for relation in self.relations:
+                if relation in item:
+                    item[relation] = list(dict.fromkeys(item[relation]))
+        errors = self._check_references(self.context['request'].user, items)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return items
+
+    def _check_references(self, user, items):
+        """
+        Return per-item errors for ids the user does not own
+        :param user:
+        :param items:
+        :return: list of error dicts
+        """
+        owned = {}
+        for relation, model in zip(self.relations, (Member, Tag)):
+            ids = {pk for item in items for pk in item.get(relation, ())}
+            owned[relation] = set(
+                model.objects.filter(user=user, id__in=ids)
+                .values_list('id', flat=True)
+            ) if ids else set()
+        self.bands = Band.objects.filter(user=user).in_bulk(
+            [item['id'] for item in items if 'id' in item]
+        )
+
+        errors = []
+        for item in items:
+            item_errors = {}
+            if 'id' in item and item['id'] not in self.bands:
+                item_errors['id'] = [
+                    f'Invalid pk "{item["id"]}" - object does not exist.'
+                ]
+            for relation in self.relations:
+                missing = [pk for pk in item.get(relation, ())
+                           if pk not in owned[relation]]
+                if missing:
+                    item_errors[relation] = [
+                        f'Invalid pk "{pk}" - object does not exist.'
+                        for pk in missing
+                    ]
+            errors.append(item_errors)
+
+        return errors
+
+    def create(self, validated_data):
+        """
+        Insert new bands and update the ones given with an id.
+        Bands are written with bulk_create/bulk_update and all through
+        rows with one multi-row insert per relation, in one transaction.
+        :param validated_data:
+        :return: list of bands in input order
+        """
+        bands, new, updated, update_fields = [], [], [], {'modified'}
+        now = timezone.now()
+        for item in validated_data:
+            fields = {key: value for key, value in item.items()
+                      if key not in self.relations and key != 'id'}
+            if 'id' in item:
+                band = self.bands[item['id']]
+                fields.pop('user', None)
+                for key, value in fields.items():
+                    setattr(band, key, value)
+                band.modified = now
+                update_fields.update(fields)
+                updated.append(band)
+            else:
+                band = Band(**fields)
+                new.append(band)
+            bands.append(band)
+
+        with transaction.atomic():
+            self._insert(new)
+            if updated:
+                Band.objects.bulk_update(updated, sorted(update_fields))
+            for relation in self.relations:
+                self._set_relation(relation, bands, validated_data)
+
+        return bands
+
+    def _insert(self, bands):
+        """
+        Insert new bands, falling back to single inserts on backends that
+        cannot return primary keys from a bulk insert
+        :param bands:
+        :return: None
+        """
+        features = connections[Band.objects.db].features
+        if features.can_return_rows_from_bulk_insert:
+            Band.objects.bulk_create(bands)
+        else:
+            for band in bands:
+                band.save()
+
+    def _set_relation(self, relation, bands, validated_data):
+        """
+        Replace the through rows of one relation for the whole batch
+        :param relation: 'members' or 'tags'
+        :param bands:
+        :param validated_data:
+        :return: None
+        """
+        descriptor = getattr(Band, relation)
+        through = descriptor.through
+        target = f'{descriptor.field.m2m_reverse_field_name()}_id'
+        replaced = [band.id for band, item in zip(bands, validated_data)
+                    if 'id' in item and relation in item]
+        if replaced:
+            through.objects.filter(band_id__in=replaced).delete()
+
+        through.objects.bulk_create([
+            through(band_id=band.id, **{target: pk})
+            for band, item in zip(bands, validated_data)
+            for pk in item.get(relation, ())
+        ])
+
+
+class BandBulkSerializer(TimedSerializerMixin,
+                         serializers.ModelSerializer):
+    """
+    Serialize a band item of a bulk create/update request.
+    Items with an id update that band, items without one create a band.
+    """
+    id = serializers.IntegerField(required=False)
+    members = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    class Meta:
+        model = Band
+        fields = BandSerializer.Meta.fields
+        extra_kwargs = {
+            'image_variants': {'read_only': True},
+            'title': {'required': False},
+            'band_members': {'required': False},
+            'tickets': {'required': False},
+        }
+        list_serializer_class = BandBulkListSerializer
+
+    def validate(self, attrs):
+        """
+        Require the model fields when the item creates a new band
+        :param attrs:
+        :return: attrs
+        """
+        if 'id' not in attrs:
+            required = ('title', 'band_members', 'tickets')
+            missing = {field: ['This field is required.']
+                       for field in required if field not in attrs}
+            if missing:
+                raise serializers.ValidationError(missing)
+
+        return attrs
+
+
+class HeaderValidatedImageField(serializers.FileField):
+    """
+    Image field that validates an upload from its header only.
+    Format, mode, dimensions and size are checked before any pixel data
+    is decoded, so oversized images and decompression bombs are rejected
+    without loading them.
+    """
+    formats = ('JPEG', 'PNG', 'GIF', 'WEBP')
+    modes = ('1', 'L', 'LA', 'P', 'PA', 'RGB', 'RGBA', 'CMYK', 'YCbCr')
+    default_error_messages = {
+        'invalid_image': _(
+            'Upload a valid image. The file you uploaded was either not '
+            'an image or a corrupted image.'
+        ),
+        'format': _('Unsupported image format "{format}".'),
+        'mode': _('Unsupported image mode "{mode}".'),
+        'max_pixels': _(
+            'Ensure this image has at most {max_pixels} pixels '
+            '(it has {pixels}).'
+        ),
+        'max_bytes': _(
+            'Ensure this file has at most {max_bytes} bytes (it has {size}).'
+        ),
+        'decompression_bomb': _('Image dimensions are too large.'),
+    }
+
+    def to_internal_value(self, data):
+        """Return the uploaded file if its header passes the checks"""
+        file = super().to_internal_value(data)
+        max_bytes = settings.UPLOAD_MAX_BYTES
+        if file.size > max_bytes:
+            self.fail('max_bytes', max_bytes=max_bytes, size=file.size)
+
+        # Images over BAND_IMAGE_MAX_PIXELS are rejected below, Pillow only
+        # refuses to open the ones far above its own limit
+        try:
+            image = Image.open(file)
+            image_format, mode = image.format, image.mode
+            width, height = image.size
+        except Image.DecompressionBombError:
+            self.fail('decompression_bomb')
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file.seek(0)
+
+        if image_format not in self.formats:
+            self.fail('format', format=image_format)
+        if mode not in self.modes:
+            self.fail('mode', mode=mode)
+        pixels = width * height
+        if pixels > settings.BAND_IMAGE_MAX_PIXELS:
+            self.fail('max_pixels',
+                      max_pixels=settings.BAND_IMAGE_MAX_PIXELS,
+                      pixels=pixels)
+
+        file.content_type = Image.MIME.get(image_format)
+        return file
+
+
+class BandImageSerializer(TimedSerializerMixin,
+                          serializers.ModelSerializer):
     """
     Serializer for uploading images
     """
+    image = HeaderValidatedImageField()
+
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Band
-        fields = ('id', 'image')
-        read_only_fields = ('id',)
+        fields = ('id', 'image', 'image_status', 'image_variants')
+        read_only_fields = ('id', 'image_status')
@@ -0,0 +1,46 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Band, Member, Tag
+from core.server import worker_exiting
+from rockband.cache import bump_user_version
+from rockband.tasks import drain_task_queue
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Band)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Band)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Member)
+def invalidate_saved(sender, instance, **kwargs):
+    """Invalidate the cached lists of the owner of a changed object"""
+    bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Band.members.through)
+@receiver(m2m_changed, sender=Band.tags.through)
+def invalidate_relation(sender, instance, action, **kwargs):
+    """Invalidate the cached lists when band members or tags change"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def reset_new_user(sender, instance, created, **kwargs):
+    """Start a new user from a fresh cache version"""
+    if created:
+        bump_user_version(instance.pk)
+
+
+@receiver(worker_exiting)
+def drain_tasks(sender, timeout, **kwargs):
+    """Finish the queued tasks before a server worker exits"""
+    unfinished = drain_task_queue(timeout)
+    if unfinished:
+        logger.warning('Worker exiting with %d unfinished tasks', unfinished)
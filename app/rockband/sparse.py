@@ -0,0 +1,56 @@
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsMixin:
+    """
+    Trim read responses to the fields listed in the `fields` query param.
+
+    The requested names are passed to the serializers as the `fields`
+    context entry, in the order of the serializer fields, so querysets can
+    load only what the response shows.
+    """
+    fields_query_param = 'fields'
+    sparse_actions = ('list', 'retrieve')
+
+    def requested_fields(self):
+        """
+        Return the fields asked for by the client, None for all of them
+        :return: tuple or None
+        :raise ValidationError: on a field the serializer does not have
+        """
+        if self.action not in self.sparse_actions:
+            return None
+
+        value = self.request.query_params.get(self.fields_query_param)
+        names = {name.strip() for name in (value or '').split(',')} - {''}
+        if not names:
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+        unknown = sorted(names.difference(available))
+        if unknown:
+            raise ValidationError({self.fields_query_param: [
+                f'Unknown fields: {", ".join(unknown)}. '
+                f'Must be among: {", ".join(available)}.'
+            ]})
+
+        return tuple(name for name in available if name in names)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields()
+
+        return context
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Drop the serializer fields missing from the `fields` context entry
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
@@ -0,0 +1,109 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when the local task queue has no free slot"""
+
+
+class LocalTaskQueue:
+    """
+    Bounded in-process task queue backed by a thread pool.
+
+    Stands in for an external broker: at most `workers` tasks run at once
+    and at most `size` more wait, so a burst of uploads cannot pile up
+    unbounded work in the web process.
+    """
+
+    def __init__(self, workers, size):
+        self.workers = workers
+        self.size = size
+        self._slots = threading.BoundedSemaphore(workers + size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='rockband-task'
+                )
+
+            return self._executor
+
+    def _run(self, func, args):
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('Task %s failed', func.__name__)
+        finally:
+            close_old_connections()
+            self._slots.release()
+            with self._idle:
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.notify_all()
+
+    def submit(self, func, *args):
+        """
+        Queue a task, or run it inline when tasks are eager
+        :param func:
+        :param args:
+        :return: None
+        """
+        if settings.TASKS_EAGER:
+            func(*args)
+            return
+
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull()
+        executor = self._get_executor()
+        with self._idle:
+            self._pending += 1
+        executor.submit(self._run, func, args)
+
+    def drain(self, timeout=None):
+        """
+        Wait for the queued and running tasks to finish
+        :param timeout: seconds to wait at most, None to wait for all
+        :return: number of tasks still unfinished
+        """
+        with self._idle:
+            self._idle.wait_for(lambda: not self._pending, timeout)
+            return self._pending
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def task_queue():
+    """Return the task queue of this process"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = LocalTaskQueue(settings.TASK_WORKERS,
+                                    settings.TASK_QUEUE_SIZE)
+
+        return _queue
+
+
+def drain_task_queue(timeout=None):
+    """
+    Wait for the tasks of this process, if it queued any
+    :param timeout: seconds to wait at most
+    :return: number of tasks still unfinished
+    """
+    with _queue_lock:
+        queue = _queue
+
+    return queue.drain(timeout) if queue else 0
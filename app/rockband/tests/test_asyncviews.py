@@ -0,0 +1,98 @@
+import asyncio
+import io
+import threading
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, SimpleTestCase
+from django.urls import resolve, reverse
+
+from core.handlers import get_asgi_application
+from rockband.asyncviews import async_read_view
+
+READ_URLS = (
+    reverse('rockband:band-list'),
+    reverse('rockband:band-detail', args=[1]),
+    reverse('rockband:tag-list'),
+    reverse('rockband:member-list'),
+)
+
+
+def thread_view(request):
+    """Return the id of the thread the view runs in"""
+    return HttpResponse(str(threading.get_ident()))
+
+
+class AsyncReadViewTests(SimpleTestCase):
+    """
+    Test the async wrapper of the read endpoints
+    """
+
+    def test_asgi_read_routes_are_async(self):
+        """
+        Test list and detail routes of the ASGI urlconf are async views
+        :return:
+        """
+        for url in READ_URLS:
+            with self.subTest(url=url):
+                func = resolve(url, urlconf=settings.ASGI_URLCONF).func
+                self.assertTrue(asyncio.iscoroutinefunction(func))
+                self.assertTrue(func.csrf_exempt)
+
+    def test_wsgi_read_routes_stay_sync(self):
+        """
+        Test the WSGI urlconf serves reads through the plain sync views
+        :return:
+        """
+        for url in READ_URLS:
+            with self.subTest(url=url):
+                func = resolve(url).func
+                self.assertFalse(asyncio.iscoroutinefunction(func))
+
+    def test_extra_action_routes_stay_sync(self):
+        """
+        Test routes without a read action are not wrapped
+        :return:
+        """
+        func = resolve(reverse('rockband:band-export'),
+                       urlconf=settings.ASGI_URLCONF).func
+
+        self.assertFalse(asyncio.iscoroutinefunction(func))
+
+    def test_asgi_application_routes_through_asgi_urlconf(self):
+        """
+        Test the ASGI application resolves requests with the ASGI urlconf
+        :return:
+        """
+        request, _ = get_asgi_application().create_request(
+            {'type': 'http', 'method': 'GET', 'path': '/',
+             'query_string': b'', 'headers': []},
+            io.BytesIO()
+        )
+
+        self.assertEqual(request.urlconf, settings.ASGI_URLCONF)
+
+    def test_asgi_read_offloaded(self):
+        """
+        Test reads coming through ASGI run in a pool thread
+        :return:
+        """
+        view = async_read_view(thread_view)
+        request = AsyncRequestFactory().get('/')
+
+        res = async_to_sync(view)(request)
+
+        self.assertNotEqual(int(res.content), threading.get_ident())
+
+    def test_asgi_write_stays_in_request_thread(self):
+        """
+        Test writes coming through ASGI are not offloaded
+        :return:
+        """
+        view = async_read_view(thread_view)
+        request = AsyncRequestFactory().post('/')
+
+        res = async_to_sync(view)(request)
+
+        self.assertEqual(int(res.content), threading.get_ident())
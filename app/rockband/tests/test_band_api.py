@@ -1,20 +1,40 @@
+import csv
+import io
+import json
+from datetime import timedelta
 import tempfile
 import os
+from unittest.mock import patch
 
 from PIL import Image
 
+from asgiref.sync import async_to_sync
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import signals
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from core.handlers import get_asgi_application
 from core.models import Band, Tag, Member
 
+from rockband.export import band_rows, ndjson_lines, stream_lines
+from rockband.images import IMAGE_FORMATS, IMAGE_SIZES, \
+    available_formats, process_band_image
+from rockband.pagination import KeysetCursorPagination
 from rockband.serializers import BandSerializer, BandDetailSerializer
+from rockband.tasks import QueueFull
 
 BAND_URL = reverse('rockband:band-list')
+EXPORT_URL = reverse('rockband:band-export')
+BULK_URL = reverse('rockband:band-bulk')
 
 
 def image_upload_url(band_id):
@@ -26,6 +46,15 @@ def image_upload_url(band_id):
     return reverse('rockband:band-upload-image', args=[band_id])
 
 
+def image_url(band_id):
+    """
+    Return URL for the negotiated band image
+    :param band_id:
+    :return:
+    """
+    return reverse('rockband:band-image', args=[band_id])
+
+
 def detail_url(band_id):
     """
     Return band detail url
@@ -210,6 +239,36 @@ class PrivateBandApiTests(TestCase):
         self.assertIn(member1, members)
         self.assertIn(member2, members)
 
+    def test_create_band_invalid_relations(self):
+        """
+        Test unknown or malformed related ids are rejected in one query
+        :return:
+        """
+        tag = sample_tag(user=self.user)
+        payload = {
+            'title': 'Nightwish',
+            'band_members': 5,
+            'tickets': 29.9
+        }
+
+        with self.assertNumQueries(1):
+            res = self.client.post(
+                BAND_URL,
+                dict(payload, tags=[tag.id, tag.id + 100]),
+                format='json'
+            )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(tag.id + 100), res.data['tags'][0])
+
+        res = self.client.post(BAND_URL, dict(payload, tags=['abc']),
+                               format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(BAND_URL, dict(payload, tags=str(tag.id)),
+                               format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Band.objects.exists())
+
     def test_partial_update_band(self):
         """
         Test updating a band with patch
@@ -255,7 +314,12 @@ class PrivateBandApiTests(TestCase):
         self.assertEqual(len(tags), 0)
 
 
+@override_settings(BAND_IMAGE_ASYNC=False)
 class BandImageUploadTests(TestCase):
+    """
+    Test uploading band images, processed inline unless a test turns
+    BAND_IMAGE_ASYNC on
+    """
 
     def setUp(self):
         self.client = APIClient()
@@ -286,6 +350,257 @@ class BandImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.band.image.path))
 
+    def test_upload_image_variants(self):
+        """
+        Test uploading an image generates its variants inline
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with tempfile.NamedTemporaryFile(suffix='.png') as ntf:
+            img = Image.new('RGBA', (800, 400))
+            img.save(ntf, format='PNG')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+
+        self.band.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Band.IMAGE_READY)
+        self.assertEqual(set(res.data['image_variants']),
+                         set(IMAGE_SIZES))
+        self.assertEqual(set(res.data['image_variants']['small']),
+                         set(available_formats()))
+        storage = self.band.image.storage
+        for key in available_formats():
+            with storage.open(
+                    self.band.image_variants['medium'][key]) as variant:
+                medium = Image.open(variant)
+                self.assertEqual(medium.format, IMAGE_FORMATS[key][0])
+                self.assertEqual(medium.size, (480, 240))
+
+    @override_settings(BAND_IMAGE_ASYNC=True)
+    def test_upload_image_async(self):
+        """
+        Test an async upload is acknowledged and processed in background
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with patch('rockband.tasks.LocalTaskQueue.submit') as submit:
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+                Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+                ntf.seek(0)
+                res = self.client.post(url, {'image': ntf},
+                                       format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['image_status'], Band.IMAGE_PENDING)
+        self.assertEqual(res.data['image_variants'], {})
+        submit.assert_called_once_with(process_band_image, self.band.id)
+
+        process_band_image(self.band.id)
+
+        res = self.client.get(detail_url(self.band.id))
+        self.assertEqual(res.data['image_status'], Band.IMAGE_READY)
+        self.assertIn('small', res.data['image_variants'])
+
+    @override_settings(BAND_IMAGE_ASYNC=True)
+    def test_list_refreshed_after_processing(self):
+        """
+        Test cached lists and their validators change once the image of
+        a band is processed in background
+        :return:
+        """
+        with patch('rockband.tasks.LocalTaskQueue.submit'):
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+                Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+                ntf.seek(0)
+                self.client.post(image_upload_url(self.band.id),
+                                 {'image': ntf}, format='multipart')
+        res = self.client.get(BAND_URL)
+        self.assertEqual(res.data[0]['image_variants'], {})
+        etag = res['ETag']
+
+        process_band_image(self.band.id)
+
+        res = self.client.get(BAND_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data[0]['image_variants']),
+                         set(IMAGE_SIZES))
+        self.assertNotEqual(res['ETag'], etag)
+
+    @override_settings(BAND_IMAGE_ASYNC=True)
+    def test_stale_image_processed(self):
+        """
+        Test an image whose task was lost is processed by the sweep once
+        it is old enough
+        :return:
+        """
+        with patch('rockband.tasks.LocalTaskQueue.submit'):
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+                Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+                ntf.seek(0)
+                self.client.post(image_upload_url(self.band.id),
+                                 {'image': ntf}, format='multipart')
+
+        call_command('process_stale_images', stdout=io.StringIO())
+        self.band.refresh_from_db()
+        self.assertEqual(self.band.image_status, Band.IMAGE_PENDING)
+
+        Band.objects.filter(pk=self.band.pk)\
+            .update(modified=timezone.now() - timedelta(hours=1))
+        call_command('process_stale_images', stdout=io.StringIO())
+        self.band.refresh_from_db()
+        self.assertEqual(self.band.image_status, Band.IMAGE_READY)
+
+    @override_settings(BAND_IMAGE_ASYNC=True)
+    def test_upload_image_queue_full(self):
+        """
+        Test the image is processed inline when the queue is full
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with patch('rockband.tasks.LocalTaskQueue.submit',
+                   side_effect=QueueFull):
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+                Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+                ntf.seek(0)
+                res = self.client.post(url, {'image': ntf},
+                                       format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Band.IMAGE_READY)
+
+    def test_image_negotiates_format(self):
+        """
+        Test the image endpoint redirects to the best accepted format
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (300, 200)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.client.post(url, {'image': ntf}, format='multipart')
+        self.band.refresh_from_db()
+        variants = self.band.image_variants['small']
+        url = image_url(self.band.id)
+
+        res = self.client.get(url, {'size': 'small'},
+                              HTTP_ACCEPT='image/webp,image/*;q=0.8')
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertTrue(res['Location'].endswith(variants['webp']))
+        self.assertIn('Accept', res['Vary'])
+
+        res = self.client.get(url, {'size': 'small'}, HTTP_ACCEPT='*/*')
+        self.assertTrue(res['Location'].endswith(variants['jpeg']))
+
+        res = self.client.get(url, {'size': 'huge'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_image_without_variant(self):
+        """
+        Test a size without variants falls back to the original image
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (30, 20)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.client.post(url, {'image': ntf}, format='multipart')
+        self.band.refresh_from_db()
+        Band.objects.filter(pk=self.band.pk).update(
+            image_variants={'small': self.band.image_variants['small']}
+        )
+
+        res = self.client.get(image_url(self.band.id), {'size': 'large'})
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertTrue(res['Location'].endswith(self.band.image.name))
+
+    def test_image_ready_without_file(self):
+        """
+        Test a ready band without any image file returns 404
+        :return:
+        """
+        Band.objects.filter(pk=self.band.pk).update(
+            image_status=Band.IMAGE_READY, image_variants={}
+        )
+
+        res = self.client.get(image_url(self.band.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_image_not_ready(self):
+        """
+        Test the image endpoint returns 404 before variants exist
+        :return:
+        """
+        res = self.client.get(image_url(self.band.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(BAND_IMAGE_MAX_PIXELS=99)
+    def test_upload_image_too_many_pixels(self):
+        """
+        Test an image over the pixel limit is rejected before decoding
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with patch('PIL.ImageFile.ImageFile.load') as load:
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+                Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+                ntf.seek(0)
+                res = self.client.post(url, {'image': ntf},
+                                       format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+        load.assert_not_called()
+
+    def test_upload_image_decompression_bomb(self):
+        """
+        Test an image Pillow refuses to open as a bomb is rejected
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with patch('PIL.Image.MAX_IMAGE_PIXELS', 10):
+            with tempfile.NamedTemporaryFile(suffix='.png') as ntf:
+                Image.new('RGB', (10, 10)).save(ntf, format='PNG')
+                ntf.seek(0)
+                res = self.client.post(url, {'image': ntf},
+                                       format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['image'],
+                         ['Image dimensions are too large.'])
+
+    @override_settings(UPLOAD_MAX_BYTES=1024)
+    def test_upload_image_too_many_bytes(self):
+        """
+        Test an upload over the byte limit is aborted while streaming
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with tempfile.NamedTemporaryFile(suffix='.png') as ntf:
+            Image.effect_noise((64, 64), 100).save(ntf, format='PNG')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+
+        self.band.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.band.image)
+
+    def test_upload_image_unsupported_format(self):
+        """
+        Test an image in an unsupported format is rejected
+        :return:
+        """
+        url = image_upload_url(self.band.id)
+        with tempfile.NamedTemporaryFile(suffix='.bmp') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='BMP')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_upload_image_bad_request(self):
         """
         Test uploading an invalid image
@@ -352,3 +667,575 @@ class BandImageUploadTests(TestCase):
         self.assertIn(serializer1.data, res.data)
         self.assertIn(serializer2.data, res.data)
         self.assertNotIn(serializer3.data, res.data)
+
+
+class BandPaginationTests(TestCase):
+    """
+    Test cursor pagination of the band list
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_walk_pages_with_cursor(self):
+        """
+        Test following next links returns every band exactly once
+        :return:
+        """
+        bands = [sample_band(user=self.user, title=f'Band {i}')
+                 for i in range(5)]
+
+        res = self.client.get(BAND_URL, {'page_size': 2})
+        seen = []
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(band['id'] for band in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(seen, sorted((band.id for band in bands),
+                                      reverse=True))
+
+    def test_page_size_capped(self):
+        """
+        Test the client page size is capped at the server maximum
+        :return:
+        """
+        for i in range(3):
+            sample_band(user=self.user)
+
+        with patch.object(KeysetCursorPagination, 'max_page_size', 2):
+            res = self.client.get(BAND_URL, {'page_size': 100})
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_unpaginated_without_params(self):
+        """
+        Test the band list stays a plain list when no page is requested
+        :return:
+        """
+        sample_band(user=self.user)
+
+        res = self.client.get(BAND_URL)
+
+        self.assertIsInstance(res.data, list)
+
+    def test_cursor_of_other_user_rejected(self):
+        """
+        Test a cursor issued for another user is rejected
+        :return:
+        """
+        user2 = get_user_model().objects.create_user(
+            'other@rockbanddev.com',
+            'testpass2'
+        )
+        cursor = KeysetCursorPagination()
+        cursor.user_id = user2.id
+
+        res = self.client.get(
+            BAND_URL,
+            {'cursor': cursor.encode_cursor(1)}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_cursor(self):
+        """
+        Test a malformed cursor is rejected
+        :return:
+        """
+        res = self.client.get(BAND_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_paginate_filtered_bands(self):
+        """
+        Test pagination keeps the tags filter applied
+        :return:
+        """
+        tag = sample_tag(user=self.user)
+        tagged = sample_band(user=self.user, title='Sabaton')
+        tagged.tags.add(tag)
+        sample_band(user=self.user, title='Rage')
+
+        res = self.client.get(BAND_URL, {'tags': tag.id, 'page_size': 10})
+
+        self.assertEqual([band['id'] for band in res.data['results']],
+                         [tagged.id])
+        self.assertIsNone(res.data['next'])
+
+
+class BandExportTests(TestCase):
+    """
+    Test streaming export of the user's bands
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.band = sample_band(user=self.user, title='Sabaton')
+        self.band.tags.add(sample_tag(user=self.user, name='Power'))
+        self.band.members.add(sample_member(user=self.user, name='Joakim'),
+                              sample_member(user=self.user, name='Par'))
+
+    def test_export_ndjson(self):
+        """
+        Test exporting bands as NDJSON
+        :return:
+        """
+        sample_band(user=self.user, title='Rage')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1], {
+            'id': self.band.id,
+            'title': 'Sabaton',
+            'band_members': 5,
+            'tickets': '25.99',
+            'link': '',
+            'members': ['Joakim', 'Par'],
+            'tags': ['Power'],
+        })
+
+    def test_export_csv(self):
+        """
+        Test exporting bands as CSV
+        :return:
+        """
+        res = self.client.get(EXPORT_URL, {'export_format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual(rows[0][-2:], ['members', 'tags'])
+        self.assertEqual(rows[1][-2:], ['Joakim|Par', 'Power'])
+
+    def test_export_limited_to_user(self):
+        """
+        Test only the authenticated user's bands are exported
+        :return:
+        """
+        user2 = get_user_model().objects.create_user(
+            'other@rockbanddevv.com',
+            'testpass2'
+        )
+        sample_band(user=user2)
+
+        res = self.client.get(EXPORT_URL)
+
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_export_closed_early(self):
+        """
+        Test closing an unfinished export closes the database connection
+        :return:
+        """
+        sample_band(user=self.user, title='Rage')
+        rows = band_rows(Band.objects.filter(user=self.user), chunk_size=1)
+        lines = stream_lines(ndjson_lines, rows)
+        next(lines)
+
+        with patch.object(connection, 'close') as close:
+            lines.close()
+
+        close.assert_called_once_with()
+
+    def test_export_finished_keeps_connection(self):
+        """
+        Test a complete export leaves the connection to the request cycle
+        :return:
+        """
+        rows = band_rows(Band.objects.filter(user=self.user))
+
+        with patch.object(connection, 'close') as close:
+            self.assertEqual(len(list(stream_lines(ndjson_lines, rows))), 1)
+
+        close.assert_not_called()
+
+    def test_export_through_asgi(self):
+        """
+        Test the export streams every row through the ASGI application
+        :return:
+        """
+        sample_band(user=self.user, title='Rage')
+        token = Token.objects.create(user=self.user)
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': EXPORT_URL,
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Token {token.key}'.encode()),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        # Keep the test transaction open, like the test client does
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        try:
+            async_to_sync(get_asgi_application())(scope, receive, send)
+        finally:
+            signals.request_started.connect(close_old_connections)
+            signals.request_finished.connect(close_old_connections)
+
+        self.assertEqual(messages[0]['status'], status.HTTP_200_OK)
+        body = b''.join(message.get('body', b'')
+                        for message in messages[1:])
+        lines = body.decode().splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines],
+                         ['Rage', 'Sabaton'])
+        self.assertNotIn('more_body', messages[-1])
+
+    def test_export_invalid_format(self):
+        """
+        Test an unknown export format is rejected
+        :return:
+        """
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BandBulkTests(TestCase):
+    """
+    Test creating and updating bands in bulk
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_bands(self):
+        """
+        Test creating several bands with members and tags
+        :return:
+        """
+        tag = sample_tag(user=self.user)
+        member1 = sample_member(user=self.user, name='Joakim')
+        member2 = sample_member(user=self.user, name='Par')
+        payload = [
+            {'title': 'Sabaton', 'band_members': 5, 'tickets': '29.90',
+             'members': [member1.id, member2.id], 'tags': [tag.id]},
+            {'title': 'Rage', 'band_members': 3, 'tickets': '19.90'},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([band['title'] for band in res.data],
+                         ['Sabaton', 'Rage'])
+        band = Band.objects.get(id=res.data[0]['id'])
+        self.assertEqual(band.user, self.user)
+        self.assertEqual(set(band.members.all()), {member1, member2})
+        self.assertEqual(list(band.tags.all()), [tag])
+        self.assertEqual(res.data[0], BandSerializer(band).data)
+
+    def test_bulk_duplicate_relation_ids(self):
+        """
+        Test ids repeated within an item are linked once
+        :return:
+        """
+        tag = sample_tag(user=self.user)
+        member = sample_member(user=self.user)
+        band = sample_band(user=self.user)
+        payload = [
+            {'title': 'Sabaton', 'band_members': 5, 'tickets': '29.90',
+             'members': [member.id, member.id], 'tags': [tag.id, tag.id]},
+            {'id': band.id, 'tags': [tag.id, tag.id]},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data[0]['members'], [member.id])
+        self.assertEqual(res.data[0]['tags'], [tag.id])
+        self.assertEqual(list(band.tags.all()), [tag])
+
+    def test_bulk_update_bands(self):
+        """
+        Test items with an id update the existing band
+        :return:
+        """
+        band = sample_band(user=self.user)
+        band.tags.add(sample_tag(user=self.user))
+        new_tag = sample_tag(user=self.user, name='Hard Rock')
+        payload = [{'id': band.id, 'title': 'Deep Purple',
+                    'tags': [new_tag.id]}]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        band.refresh_from_db()
+        self.assertEqual(band.title, 'Deep Purple')
+        self.assertEqual(band.band_members, 5)
+        self.assertEqual(list(band.tags.all()), [new_tag])
+
+    def test_bulk_errors_reported_per_item(self):
+        """
+        Test invalid items are reported and nothing is written
+        :return:
+        """
+        payload = [
+            {'title': 'Sabaton', 'band_members': 5, 'tickets': '29.90'},
+            {'title': 'Rage'},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('tickets', res.data[1])
+        self.assertFalse(Band.objects.exists())
+
+    def test_bulk_other_users_tags_rejected(self):
+        """
+        Test referencing tags of another user is rejected per item
+        :return:
+        """
+        user2 = get_user_model().objects.create_user(
+            'other@rockbanddevv.com',
+            'testpass2'
+        )
+        other_tag = sample_tag(user=user2)
+        payload = [
+            {'title': 'Sabaton', 'band_members': 5, 'tickets': '29.90'},
+            {'title': 'Slayer', 'band_members': 4, 'tickets': '9.90',
+             'tags': [other_tag.id]},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('tags', res.data[1])
+        self.assertFalse(Band.objects.exists())
+
+    def test_bulk_update_other_users_band(self):
+        """
+        Test updating a band of another user is rejected
+        :return:
+        """
+        user2 = get_user_model().objects.create_user(
+            'other@rockbanddevv.com',
+            'testpass2'
+        )
+        band = sample_band(user=user2)
+
+        res = self.client.post(BULK_URL, [{'id': band.id, 'title': 'X'}],
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0])
+
+    def test_bulk_max_items(self):
+        """
+        Test a batch larger than the server maximum is rejected
+        :return:
+        """
+        payload = [{'title': 'Band', 'band_members': 1, 'tickets': '1.00'}]
+
+        with patch('rockband.views.BandViewSet.bulk_max_items', 0):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Band.objects.exists())
+
+
+class BandConditionalGetTests(TestCase):
+    """
+    Test ETag and Last-Modified revalidation of bands
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.band = sample_band(user=self.user)
+
+    def test_detail_not_modified(self):
+        """
+        Test a matching ETag returns 304 with one query
+        :return:
+        """
+        url = detail_url(self.band.id)
+        res = self.client.get(url)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_if_modified_since(self):
+        """
+        Test a current If-Modified-Since returns 304
+        :return:
+        """
+        url = detail_url(self.band.id)
+        res = self.client.get(url)
+
+        res = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified']
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_changed_by_relation(self):
+        """
+        Test adding or renaming a tag changes the band ETag
+        :return:
+        """
+        url = detail_url(self.band.id)
+        etag = self.client.get(url)['ETag']
+        tag = sample_tag(user=self.user)
+        self.band.tags.add(tag)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res['ETag']
+        tag.name = 'Thrash'
+        tag.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Thrash')
+
+    def test_list_not_modified(self):
+        """
+        Test an unchanged list returns 304 without any query
+        :return:
+        """
+        etag = self.client.get(BAND_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(BAND_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_changed_by_delete(self):
+        """
+        Test deleting a band invalidates the list validators
+        :return:
+        """
+        sample_band(user=self.user, title='Rage')
+        res = self.client.get(BAND_URL)
+        later = timezone.now() + timedelta(minutes=1)
+        with patch('rockband.cache.timezone.now', return_value=later):
+            self.band.delete()
+
+        etag_res = self.client.get(BAND_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        date_res = self.client.get(
+            BAND_URL,
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified']
+        )
+
+        self.assertEqual(etag_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(etag_res.data), 1)
+        self.assertNotEqual(date_res.status_code,
+                            status.HTTP_304_NOT_MODIFIED)
+
+
+class BandFilterMatchTests(TestCase):
+    """
+    Test any/all matching of the band tags and members filters
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag1 = sample_tag(user=self.user, name='Power')
+        self.tag2 = sample_tag(user=self.user, name='Symphonic')
+        self.both = sample_band(user=self.user, title='Sonata Arctica')
+        self.both.tags.add(self.tag1, self.tag2)
+        self.one = sample_band(user=self.user, title='Sabaton')
+        self.one.tags.add(self.tag1)
+
+    def test_filter_any_without_duplicates(self):
+        """
+        Test a band matching several ids is returned once
+        :return:
+        """
+        res = self.client.get(
+            BAND_URL,
+            {'tags': f'{self.tag1.id},{self.tag2.id}'}
+        )
+
+        self.assertEqual([band['id'] for band in res.data],
+                         [self.one.id, self.both.id])
+
+    def test_filter_all(self):
+        """
+        Test match=all only returns bands linked to every id
+        :return:
+        """
+        res = self.client.get(
+            BAND_URL,
+            {'tags': f'{self.tag1.id},{self.tag2.id}', 'match': 'all'}
+        )
+
+        self.assertEqual([band['id'] for band in res.data], [self.both.id])
+
+    def test_filter_tags_and_members(self):
+        """
+        Test combining the tags and members filters
+        :return:
+        """
+        member = sample_member(user=self.user)
+        self.both.members.add(member)
+        self.one.members.add(member)
+
+        res = self.client.get(
+            BAND_URL,
+            {'tags': f'{self.tag1.id},{self.tag2.id}',
+             'members': f'{member.id}'}
+        )
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_filter_invalid_match(self):
+        """
+        Test an unknown match mode is rejected
+        :return:
+        """
+        res = self.client.get(BAND_URL, {'tags': self.tag1.id,
+                                         'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
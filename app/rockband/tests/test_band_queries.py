@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Band, Tag, Member
+
+BAND_URL = reverse('rockband:band-list')
+
+
+def detail_url(band_id):
+    """
+    Return band detail url
+    """
+    return reverse('rockband:band-detail', args=[band_id])
+
+
+def seed_bands(user, count):
+    """
+    Create count bands for the user, each with a member and a tag
+    :param user:
+    :param count:
+    :return: created bands, tag and member
+    """
+    tag = Tag.objects.create(user=user, name='Metal')
+    member = Member.objects.create(user=user, name='Attila')
+    Band.objects.bulk_create([
+        Band(user=user, title=f'Band {i}', band_members=5, tickets=25.99)
+        for i in range(count)
+    ])
+    bands = list(Band.objects.filter(user=user))
+    Band.tags.through.objects.bulk_create([
+        Band.tags.through(band_id=band.id, tag_id=tag.id)
+        for band in bands
+    ])
+    Band.members.through.objects.bulk_create([
+        Band.members.through(band_id=band.id, member_id=member.id)
+        for band in bands
+    ])
+
+    return bands, tag, member
+
+
+class BandQueryCountTests(TestCase):
+    """
+    Test that the band endpoints run a constant number of queries
+    """
+
+    sizes = (10, 100, 1000)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count(self):
+        """
+        Test listing bands costs one query for the bands and one for
+        both relations
+        :return:
+        """
+        for size in self.sizes:
+            with self.subTest(size=size):
+                Band.objects.all().delete()
+                seed_bands(self.user, size)
+
+                with self.assertNumQueries(2):
+                    res = self.client.get(BAND_URL)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(res.data), size)
+
+    def test_filtered_list_query_count(self):
+        """
+        Test filtering bands by tags and members keeps the query count
+        :return:
+        """
+        for size in self.sizes:
+            with self.subTest(size=size):
+                Band.objects.all().delete()
+                _, tag, member = seed_bands(self.user, size)
+
+                with self.assertNumQueries(2):
+                    res = self.client.get(
+                        BAND_URL,
+                        {'tags': f'{tag.id}', 'members': f'{member.id}'}
+                    )
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(res.data), size)
+
+    def test_retrieve_query_count(self):
+        """
+        Test retrieving a band detail does not depend on the band count
+        :return:
+        """
+        for size in self.sizes:
+            with self.subTest(size=size):
+                Band.objects.all().delete()
+                bands, tag, member = seed_bands(self.user, size)
+
+                with self.assertNumQueries(3):
+                    res = self.client.get(detail_url(bands[0].id))
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.data['tags'][0]['name'], tag.name)
+                self.assertEqual(res.data['members'][0]['name'], member.name)
@@ -0,0 +1,46 @@
+from django.test import SimpleTestCase
+
+from rockband.images import preferred_format
+
+FORMATS = ['avif', 'webp', 'jpeg']
+
+
+class PreferredFormatTests(SimpleTestCase):
+    """
+    Test negotiating the image variant format on the Accept header
+    """
+
+    def test_most_compact_accepted(self):
+        """
+        Test the most compact accepted format is picked
+        :return:
+        """
+        accept = 'image/avif,image/webp,image/*,*/*;q=0.8'
+
+        self.assertEqual(preferred_format(accept, FORMATS), 'avif')
+
+    def test_unavailable_format_skipped(self):
+        """
+        Test formats without a variant are skipped
+        :return:
+        """
+        accept = 'image/avif,image/webp'
+
+        self.assertEqual(preferred_format(accept, ['webp', 'jpeg']), 'webp')
+
+    def test_refused_format_skipped(self):
+        """
+        Test formats with q=0 are not picked
+        :return:
+        """
+        accept = 'image/avif;q=0,image/webp'
+
+        self.assertEqual(preferred_format(accept, FORMATS), 'webp')
+
+    def test_jpeg_fallback(self):
+        """
+        Test JPEG is returned without a modern format in Accept
+        :return:
+        """
+        self.assertEqual(preferred_format('*/*', FORMATS), 'jpeg')
+        self.assertEqual(preferred_format(None, FORMATS), 'jpeg')
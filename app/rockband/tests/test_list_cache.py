@@ -0,0 +1,158 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Band, Tag, Member
+
+from rockband.cache import cache_stats, response_cache
+
+BAND_URL = reverse('rockband:band-list')
+TAGS_URL = reverse('rockband:tag-list')
+MEMBERS_URL = reverse('rockband:member-list')
+
+
+def sample_band(user, **params):
+    """
+    Create and return a sample band
+    :param user:
+    :param params:
+    :return: sample band
+    """
+    defaults = {
+        'title': 'Sample Band',
+        'band_members': 5,
+        'tickets': 25.99
+    }
+    defaults.update(params)
+
+    return Band.objects.create(user=user, **defaults)
+
+
+class ListCacheTests(TestCase):
+    """
+    Test the per-user list response cache
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """
+        Test a repeated list request does not touch the database
+        :return:
+        """
+        sample_band(user=self.user)
+        before = cache_stats()
+
+        first = self.client.get(BAND_URL)
+        with self.assertNumQueries(0):
+            second = self.client.get(BAND_URL)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        after = cache_stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+
+    def test_create_invalidates(self):
+        """
+        Test creating a band invalidates the cached list
+        :return:
+        """
+        self.client.get(BAND_URL)
+        sample_band(user=self.user)
+
+        res = self.client.get(BAND_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data), 1)
+
+    def test_relation_change_invalidates(self):
+        """
+        Test adding a tag to a band invalidates the cached lists
+        :return:
+        """
+        band = sample_band(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Power')
+        self.client.get(BAND_URL)
+        self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        band.tags.add(tag)
+
+        res = self.client.get(BAND_URL)
+        self.assertEqual(res.data[0]['tags'], [tag.id])
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+        self.assertEqual(len(res.data), 1)
+
+    def test_delete_invalidates(self):
+        """
+        Test deleting a member invalidates the cached list
+        :return:
+        """
+        member = Member.objects.create(user=self.user, name='Joakim')
+        self.client.get(MEMBERS_URL)
+        member.delete()
+
+        res = self.client.get(MEMBERS_URL)
+
+        self.assertEqual(res.data, [])
+
+    def test_params_normalized(self):
+        """
+        Test filter ids in a different order share a cache entry
+        :return:
+        """
+        tag1 = Tag.objects.create(user=self.user, name='Power')
+        tag2 = Tag.objects.create(user=self.user, name='Thrash')
+        self.client.get(BAND_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        res = self.client.get(BAND_URL, {'tags': f'{tag2.id},{tag1.id}'})
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_cache_key_length_bounded(self):
+        """
+        Test long query params do not grow the cache key
+        :return:
+        """
+        sample_band(user=self.user)
+        cache = response_cache()
+
+        with patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.client.get(BAND_URL, {'page_size': '1'})
+            self.client.get(BAND_URL, {'page_size': '0' * 5000 + '1'})
+
+        short, long = (call.args[0] for call in cache_set.call_args_list
+                       if call.args[0].startswith('rockband:list')
+                       and not call.args[0].endswith(':validators'))
+        self.assertNotEqual(short, long)
+        self.assertEqual(len(short), len(long))
+
+    def test_cache_per_user(self):
+        """
+        Test users do not share cached lists
+        :return:
+        """
+        sample_band(user=self.user)
+        self.client.get(BAND_URL)
+        user2 = get_user_model().objects.create_user(
+            'other@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(BAND_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
@@ -11,6 +11,7 @@ from rockband.serializers import MemberSerializer
 
 
 MEMBERS_URL = reverse('rockband:member-list')
+MEMBERS_BULK_URL = reverse('rockband:member-bulk')
 
 
 class PublicMembersApiTests(TestCase):
@@ -156,3 +157,21 @@ class PrivateMemberApiTests(TestCase):
         res = self.client.get(MEMBERS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_bulk_create_members(self):
+        """
+        Test creating members in bulk skips the ones the user already has
+        :return:
+        """
+        existing = Member.objects.create(user=self.user, name='Joakim')
+        payload = {'names': ['Joakim', 'Par', 'Hannes']}
+
+        res = self.client.post(MEMBERS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        members = Member.objects.filter(user=self.user)
+        self.assertEqual(members.count(), 3)
+        self.assertEqual(res.data, {
+            member.name: member.id for member in members
+        })
+        self.assertEqual(res.data['Joakim'], existing.id)
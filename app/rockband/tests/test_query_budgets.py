@@ -0,0 +1,250 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Band, Member, Tag
+from core.tests import scaling
+
+
+@override_settings(BAND_IMAGE_ASYNC=False)
+class RockbandQueryScalingTests(scaling.QueryScalingTestCase):
+    """
+    Test every rockband route keeps a flat query count.
+    Images are processed inline, like uploads arriving with the task queue
+    full, the path running the most queries.
+    """
+    urlconf = 'rockband.urls'
+    namespace = 'rockband'
+    scenarios = (
+        ('rockband:api-root', 'GET', 'api_root'),
+        ('rockband:tag-list', 'GET', 'tag_list'),
+        ('rockband:tag-list', 'POST', 'tag_create'),
+        ('rockband:tag-bulk', 'POST', 'tag_bulk'),
+        ('rockband:member-list', 'GET', 'member_list'),
+        ('rockband:member-list', 'POST', 'member_create'),
+        ('rockband:member-bulk', 'POST', 'member_bulk'),
+        ('rockband:band-list', 'GET', 'band_list'),
+        ('rockband:band-list', 'GET', 'band_list_filtered'),
+        ('rockband:band-list', 'GET', 'band_list_page'),
+        ('rockband:band-list', 'POST', 'band_create'),
+        ('rockband:band-list', 'POST', 'band_create_relations'),
+        ('rockband:band-detail', 'GET', 'band_detail'),
+        ('rockband:band-detail', 'PUT', 'band_update'),
+        ('rockband:band-detail', 'PUT', 'band_update_relations'),
+        ('rockband:band-detail', 'PATCH', 'band_partial_update'),
+        ('rockband:band-detail', 'PATCH', 'band_partial_update_relations'),
+        ('rockband:band-detail', 'DELETE', 'band_detail'),
+        ('rockband:band-upload-image', 'POST', 'band_upload_image'),
+        ('rockband:band-image', 'GET', 'band_image'),
+        ('rockband:band-export', 'GET', 'band_export'),
+        ('rockband:band-bulk', 'POST', 'band_bulk'),
+    )
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def reset(self):
+        Band.objects.all().delete()
+        Tag.objects.all().delete()
+        Member.objects.all().delete()
+
+    def seed(self, size):
+        """
+        Create size tags, members and bands, each band with the first tag
+        and member
+        :param size:
+        :return: None
+        """
+        Tag.objects.bulk_create([
+            Tag(user=self.user, name=f'Tag {i}') for i in range(size)
+        ])
+        Member.objects.bulk_create([
+            Member(user=self.user, name=f'Member {i}') for i in range(size)
+        ])
+        Band.objects.bulk_create([
+            Band(user=self.user, title=f'Band {i}', band_members=4,
+                 tickets=20) for i in range(size)
+        ])
+        self.tags = list(Tag.objects.filter(user=self.user))
+        self.members = list(Member.objects.filter(user=self.user))
+        self.bands = list(Band.objects.filter(user=self.user))
+        Band.tags.through.objects.bulk_create([
+            Band.tags.through(band_id=band.id, tag_id=self.tags[0].id)
+            for band in self.bands
+        ])
+        Band.members.through.objects.bulk_create([
+            Band.members.through(band_id=band.id,
+                                 member_id=self.members[0].id)
+            for band in self.bands
+        ])
+
+    def band_payload(self, title='New band'):
+        return {
+            'title': title,
+            'band_members': 5,
+            'tickets': '30.00',
+            'members': [self.members[0].id],
+            'tags': [self.tags[0].id],
+        }
+
+    def api_root(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:api-root')}
+
+    def tag_list(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:tag-list'),
+                'data': {'assigned_only': 1}}
+
+    def tag_create(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:tag-list'),
+                'data': {'name': 'New tag'}}
+
+    def tag_bulk(self, size):
+        self.seed(size)
+        names = [f'Tag {i}' for i in range(0, size, 2)] + \
+            [f'New {i}' for i in range(self.batch_size(size // 2 or 1, 2))]
+        return {'path': reverse('rockband:tag-bulk'),
+                'data': {'names': names}, 'format': 'json'}
+
+    def member_list(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:member-list'),
+                'data': {'assigned_only': 1}}
+
+    def member_create(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:member-list'),
+                'data': {'name': 'New member'}}
+
+    def member_bulk(self, size):
+        self.seed(size)
+        names = [f'Member {i}' for i in range(0, size, 2)] + \
+            [f'New {i}' for i in range(self.batch_size(size // 2 or 1, 2))]
+        return {'path': reverse('rockband:member-bulk'),
+                'data': {'names': names}, 'format': 'json'}
+
+    def band_list(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-list')}
+
+    def band_list_filtered(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-list'),
+                'data': {'tags': self.tags[0].id,
+                         'members': self.members[0].id, 'match': 'all'}}
+
+    def band_list_page(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-list'),
+                'data': {'page_size': 50}}
+
+    def band_create(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-list'),
+                'data': self.band_payload(), 'format': 'json'}
+
+    def new_relations(self, size):
+        """
+        Create as many new tags and members as fit in one insert and
+        return them as a band payload replacing the seeded relations
+        :param size:
+        :return: dict
+        """
+        count = self.batch_size(size, 2)
+        tags = Tag.objects.bulk_create([
+            Tag(user=self.user, name=f'New tag {i}') for i in range(count)
+        ])
+        members = Member.objects.bulk_create([
+            Member(user=self.user, name=f'New member {i}')
+            for i in range(count)
+        ])
+        if any(obj.pk is None for obj in tags + members):
+            tags = Tag.objects.filter(name__startswith='New tag ')
+            members = Member.objects.filter(name__startswith='New member ')
+
+        return {'tags': [tag.id for tag in tags],
+                'members': [member.id for member in members]}
+
+    def band_create_relations(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-list'),
+                'data': dict(self.band_payload(), **self.new_relations(size)),
+                'format': 'json'}
+
+    def band_update_relations(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-detail',
+                                args=[self.bands[-1].id]),
+                'data': dict(self.band_payload('Renamed'),
+                             **self.new_relations(size)),
+                'format': 'json'}
+
+    def band_partial_update_relations(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-detail',
+                                args=[self.bands[-1].id]),
+                'data': self.new_relations(size), 'format': 'json'}
+
+    def band_detail(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-detail',
+                                args=[self.bands[-1].id])}
+
+    def band_update(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-detail',
+                                args=[self.bands[-1].id]),
+                'data': self.band_payload('Renamed'), 'format': 'json'}
+
+    def band_partial_update(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-detail',
+                                args=[self.bands[-1].id]),
+                'data': {'tags': []},
+                'format': 'json'}
+
+    def band_upload_image(self, size):
+        self.seed(size)
+        upload = tempfile.NamedTemporaryFile(suffix='.jpg')
+        self.addCleanup(upload.close)
+        Image.new('RGB', (10, 10)).save(upload, format='JPEG')
+        upload.seek(0)
+        return {'path': reverse('rockband:band-upload-image',
+                                args=[self.bands[-1].id]),
+                'data': {'image': upload}, 'format': 'multipart'}
+
+    def band_image(self, size):
+        self.seed(size)
+        band = self.bands[-1]
+        band.image_status = Band.IMAGE_READY
+        band.image_variants = {'medium': {'jpeg': 'variant.jpg'}}
+        band.save()
+        return {'path': reverse('rockband:band-image', args=[band.id])}
+
+    def band_export(self, size):
+        self.seed(size)
+        return {'path': reverse('rockband:band-export'),
+                'data': {'export_format': 'csv'}}
+
+    def band_bulk(self, size):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            self.skipTest('bulk inserts fall back to one query per band')
+        self.seed(size)
+        items = [self.band_payload(f'Bulk {i}') for i in range(size)]
+        items[0] = dict(items[0], id=self.bands[0].id)
+        return {'path': reverse('rockband:band-bulk'),
+                'data': items, 'format': 'json'}
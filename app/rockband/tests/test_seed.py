@@ -0,0 +1,72 @@
+import io
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Band, Member, Tag
+from rockband.seed import can_copy, seed_rockband
+
+
+def seed(**options):
+    call_command('seed_rockband', stdout=io.StringIO(), **options)
+
+
+def band_rows(email):
+    """Return the data of the bands of a user, independent of the ids"""
+    bands = Band.objects.filter(user__email=email).order_by('id')\
+        .prefetch_related('tags', 'members')
+
+    return [(band.title, band.band_members, band.tickets, band.link,
+             sorted(tag.name for tag in band.tags.all()),
+             sorted(member.name for member in band.members.all()))
+            for band in bands]
+
+
+class SeedRockbandCommandTests(TestCase):
+
+    def test_seed_counts(self):
+        """Test every user gets the requested rows and fan-out"""
+        seed(users=2, bands=30, tags=5, members=4, links=2, batch_size=7)
+
+        users = get_user_model().objects.filter(email__startswith='seed-')
+        self.assertEqual(users.count(), 2)
+        for user in users:
+            self.assertTrue(user.check_password('seedpass'))
+            self.assertEqual(Band.objects.filter(user=user).count(), 30)
+            self.assertEqual(Tag.objects.filter(user=user).count(), 5)
+            self.assertEqual(Member.objects.filter(user=user).count(), 4)
+        self.assertEqual(Band.tags.through.objects.count(), 2 * 30 * 2)
+        self.assertEqual(Band.members.through.objects.count(), 2 * 30 * 2)
+
+    def test_seed_deterministic(self):
+        """Test the same seed creates the same data"""
+        seed(bands=20, tags=6, members=6, seed=7, email_prefix='a')
+        seed(bands=20, tags=6, members=6, seed=7, email_prefix='b')
+        seed(bands=20, tags=6, members=6, seed=8, email_prefix='c')
+
+        first = band_rows('a-0@rockbanddev.com')
+        self.assertEqual(first, band_rows('b-0@rockbanddev.com'))
+        self.assertNotEqual(first, band_rows('c-0@rockbanddev.com'))
+
+    def test_existing_users_refused(self):
+        """Test seeding the same users twice fails"""
+        seed(bands=1)
+
+        with self.assertRaises(CommandError):
+            seed(bands=1)
+
+    @skipUnless(can_copy(), 'COPY needs Postgres')
+    def test_copy_matches_bulk_create(self):
+        """Test COPY and bulk_create load the same data"""
+        user_model = get_user_model()
+        for email, copy in (('copy@rockbanddev.com', True),
+                            ('bulk@rockbanddev.com', False)):
+            user = user_model.objects.create_user(email, 'testpass')
+            seed_rockband(user, bands=25, tags=4, members=4, seed=1,
+                          batch_size=10, copy=copy)
+
+        self.assertEqual(band_rows('copy@rockbanddev.com'),
+                         band_rows('bulk@rockbanddev.com'))
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Band, Member, Tag
+
+BAND_URL = reverse('rockband:band-list')
+
+
+def detail_url(band_id):
+    return reverse('rockband:band-detail', args=[band_id])
+
+
+class SparseFieldsTests(TestCase):
+    """
+    Test the fields query param trims band responses and their queries
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Metal')
+        self.member = Member.objects.create(user=self.user, name='Lars')
+        self.band = Band.objects.create(user=self.user, title='Metallica',
+                                        band_members=4, tickets=50)
+        self.band.tags.add(self.tag)
+        self.band.members.add(self.member)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [query['sql'] for query in queries]
+
+    def test_list_fields_in_serializer_order(self):
+        """Test the list only returns the requested fields"""
+        res, queries = self.get(BAND_URL, fields='title,id')
+
+        self.assertEqual(res.json(),
+                         [{'id': self.band.id, 'title': 'Metallica'}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('tickets', queries[-1])
+
+    def test_list_single_relation(self):
+        """Test requesting one relation loads only that relation"""
+        res, queries = self.get(BAND_URL, fields='tags')
+
+        self.assertEqual(res.json(), [{'tags': [self.tag.id]}])
+        self.assertIn('core_band_tags', queries[-1])
+        self.assertNotIn('core_band_members', queries[-1])
+
+    def test_list_without_fields_unchanged(self):
+        """Test the cached sparse list does not answer the full list"""
+        self.get(BAND_URL, fields='id')
+        res, _ = self.get(BAND_URL)
+
+        self.assertEqual(set(res.json()[0]), {
+            'id', 'title', 'members', 'tags', 'band_members', 'tickets',
+            'link', 'image_variants'
+        })
+
+    def test_paginated_sparse_list(self):
+        """Test pages without the id field still link the next page"""
+        other = Band.objects.create(user=self.user, title='Slayer',
+                                    band_members=4, tickets=40)
+
+        first, _ = self.get(BAND_URL, fields='title', page_size=1)
+        second, _ = self.get(first.data['next'])
+
+        self.assertEqual(first.json()['results'], [{'title': other.title}])
+        self.assertEqual(second.json()['results'],
+                         [{'title': self.band.title}])
+
+    def test_retrieve_projection(self):
+        """Test a sparse detail skips unrequested columns and relations"""
+        res, queries = self.get(detail_url(self.band.id),
+                                fields='title,tickets')
+
+        self.assertEqual(res.json(), {'title': 'Metallica',
+                                      'tickets': '50.00'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"link"', queries[0])
+
+    def test_retrieve_nested_relation(self):
+        """Test a requested relation of the detail is still nested"""
+        res, _ = self.get(detail_url(self.band.id), fields='members')
+
+        self.assertEqual(res.json(), {
+            'members': [{'id': self.member.id, 'name': 'Lars'}]
+        })
+
+    def test_retrieve_etag_per_fields(self):
+        """Test a sparse detail is not validated by the full detail ETag"""
+        full, _ = self.get(detail_url(self.band.id))
+        sparse, _ = self.get(detail_url(self.band.id), fields='title')
+
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+
+    def test_unknown_field(self):
+        """Test requesting a field the band does not have fails"""
+        res = self.client.get(BAND_URL, {'fields': 'title,password'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', res.data['fields'][0])
+
+    def test_detail_field_on_list(self):
+        """Test detail only fields are refused on the list"""
+        res = self.client.get(BAND_URL, {'fields': 'image_status'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -11,6 +11,7 @@ from rockband.serializers import TagSerializer
 
 
 TAGS_URL = reverse('rockband:tag-list')
+TAGS_BULK_URL = reverse('rockband:tag-bulk')
 
 
 class PublicTagsApiTests(TestCase):
@@ -132,3 +133,65 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_bulk_create_tags(self):
+        """
+        Test creating tags in bulk skips the ones the user already has
+        :return:
+        """
+        existing = Tag.objects.create(user=self.user, name='Power')
+        user2 = get_user_model().objects.create_user(
+            'other@rockbanddev.com',
+            'testpass'
+        )
+        Tag.objects.create(user=user2, name='Thrash')
+        payload = {'names': ['Power', 'Thrash', 'Doom', 'Thrash']}
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        tags = Tag.objects.filter(user=self.user)
+        self.assertEqual(tags.count(), 3)
+        self.assertEqual(res.data, {
+            tag.name: tag.id for tag in tags
+        })
+        self.assertEqual(res.data['Power'], existing.id)
+
+    def test_bulk_create_tags_existing_duplicates(self):
+        """
+        Test names the user already has twice map to their oldest tag
+        and new names to the tag just created
+        :return:
+        """
+        first = Tag.objects.create(user=self.user, name='Power')
+        Tag.objects.create(user=self.user, name='Power')
+
+        res = self.client.post(TAGS_BULK_URL, {'names': ['Power', 'Doom']},
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        doom = Tag.objects.get(user=self.user, name='Doom')
+        self.assertEqual(res.data, {'Power': first.id, 'Doom': doom.id})
+
+    def test_bulk_create_tags_existing_only(self):
+        """
+        Test bulk creating only existing tags creates nothing
+        :return:
+        """
+        tag = Tag.objects.create(user=self.user, name='Power')
+
+        res = self.client.post(TAGS_BULK_URL, {'names': ['Power']},
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'Power': tag.id})
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_bulk_create_tags_invalid(self):
+        """
+        Test bulk creating tags with an empty list fails
+        :return:
+        """
+        res = self.client.post(TAGS_BULK_URL, {'names': []}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
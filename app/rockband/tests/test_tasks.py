@@ -0,0 +1,54 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from rockband.tasks import LocalTaskQueue, QueueFull
+
+
+class LocalTaskQueueTests(SimpleTestCase):
+    """
+    Test the bounded local task queue
+    """
+
+    def test_runs_tasks(self):
+        """
+        Test a submitted task runs in a worker thread
+        :return:
+        """
+        queue = LocalTaskQueue(workers=1, size=1)
+        done = threading.Event()
+
+        queue.submit(done.set)
+
+        self.assertTrue(done.wait(5))
+
+    def test_rejects_when_full(self):
+        """
+        Test submitting beyond the workers and queue size is rejected
+        :return:
+        """
+        queue = LocalTaskQueue(workers=1, size=1)
+        release = threading.Event()
+
+        queue.submit(release.wait)
+        queue.submit(release.wait)
+        with self.assertRaises(QueueFull):
+            queue.submit(release.wait)
+        release.set()
+
+    def test_drain_waits_for_tasks(self):
+        """
+        Test draining returns once the queued tasks finished
+        :return:
+        """
+        queue = LocalTaskQueue(workers=1, size=2)
+        release = threading.Event()
+        done = []
+
+        queue.submit(release.wait)
+        queue.submit(done.append, 1)
+        self.assertEqual(queue.drain(timeout=0.1), 2)
+        release.set()
+
+        self.assertEqual(queue.drain(timeout=5), 0)
+        self.assertEqual(done, [1])
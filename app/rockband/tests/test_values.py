@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from core.models import Band, Member, Tag
+from rockband import serializers
+from rockband.views import BandViewSet, MemberViewSet, TagViewSet
+
+BAND_URL = reverse('rockband:band-list')
+
+
+class ValuesSerializerTests(TestCase):
+    """
+    Test the values serializers render exactly like the model serializers
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@rockbanddev.com',
+            'testpass'
+        )
+        self.request = Request(RequestFactory().get(BAND_URL))
+        self.request.user = self.user
+
+        tags = [Tag.objects.create(user=self.user, name=f'Tag {i}')
+                for i in range(3)]
+        members = [Member.objects.create(user=self.user, name=f'Member {i}')
+                   for i in range(3)]
+        plain = Band.objects.create(user=self.user, title='Plain',
+                                    band_members=1, tickets=Decimal('5'))
+        linked = Band.objects.create(
+            user=self.user, title='Linked', band_members=4,
+            tickets=Decimal('12.5'), link='https://rockbanddev.com',
+            image_status=Band.IMAGE_READY,
+            image_variants={'small': {'jpeg': 'small.jpg',
+                                      'webp': 'small.webp'}}
+        )
+        linked.tags.add(tags[2], tags[0])
+        linked.members.add(*members)
+        pending = Band.objects.create(
+            user=self.user, title='Pending', band_members=2, tickets=0,
+            image_status=Band.IMAGE_PENDING,
+            image_variants={'small': {'jpeg': 'old.jpg'}}
+        )
+        pending.tags.add(tags[1])
+        self.assertEqual(Band.objects.count(), 3)
+        self.assertTrue(plain.pk)
+
+    def assertRenderedEqual(self, viewset_class, **params):
+        """
+        Assert the list of a viewset renders the same JSON through both
+        serializers
+        """
+        request = Request(RequestFactory().get(BAND_URL, params))
+        request.user = self.user
+        view = viewset_class(action='list', format_kwarg=None,
+                             request=request)
+        context = view.get_serializer_context()
+
+        expected = view.get_serializer_class()(
+            view.get_queryset(), many=True, context=context
+        ).data
+        actual = view.values_serializer_class(
+            view.get_values_queryset(), context=context
+        ).data
+
+        self.assertTrue(expected)
+        self.assertEqual(JSONRenderer().render(actual),
+                         JSONRenderer().render(expected))
+
+    def test_band_output_matches(self):
+        """Test band rows match BandSerializer"""
+        self.assertRenderedEqual(BandViewSet)
+
+    def test_filtered_band_output_matches(self):
+        """Test filtered band rows match BandSerializer"""
+        tag = Tag.objects.get(name='Tag 0')
+        self.assertRenderedEqual(BandViewSet, tags=str(tag.id))
+
+    def test_tag_output_matches(self):
+        """Test tag rows match TagSerializer"""
+        self.assertRenderedEqual(TagViewSet)
+        self.assertRenderedEqual(TagViewSet, assigned_only=1)
+
+    def test_member_output_matches(self):
+        """Test member rows match MemberSerializer"""
+        self.assertRenderedEqual(MemberViewSet, assigned_only=1)
+
+    def test_empty_rows(self):
+        """Test serializing no rows runs no queries"""
+        with self.assertNumQueries(0):
+            data = serializers.BandValuesSerializer([]).data
+
+        self.assertEqual(data, [])
+
+    def test_paginated_list(self):
+        """Test the next cursor of a values page points after its last row"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        first = client.get(BAND_URL, {'page_size': 2})
+        second = client.get(first.data['next'])
+
+        titles = [band['title'] for band in first.data['results'] +
+                  second.data['results']]
+        self.assertEqual(titles, ['Pending', 'Linked', 'Plain'])
+        self.assertIsNone(second.data['next'])
@@ -1,12 +1,30 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import APIRootView, DefaultRouter
 
 from rockband import views
 
-router = DefaultRouter()
-router.register('tags', views.TagViewSet)
-router.register('members', views.MemberViewSet)
-router.register('bands', views.BandViewSet)
+
+class RockbandAPIRootView(APIRootView):
+    """Links to the rockband endpoints"""
+    query_budgets = {'get': 0}
+
+
+def build_router(router_class=DefaultRouter):
+    """
+    Return a router with the rockband viewsets registered
+    :param router_class: DefaultRouter or a subclass
+    :return: router
+    """
+    router = router_class()
+    router.APIRootView = RockbandAPIRootView
+    router.register('tags', views.TagViewSet)
+    router.register('members', views.MemberViewSet)
+    router.register('bands', views.BandViewSet)
+
+    return router
+
+
+router = build_router()
 
 app_name = 'rockband'
 
@@ -0,0 +1,42 @@
+from rest_framework.response import Response
+
+
+class ValuesListMixin:
+    """
+    Serve the list action from values() rows.
+
+    The rows are serialized by `values_serializer_class`, which gives the
+    same output as the viewset serializer without building model instances
+    or per row serializer fields. Viewsets without one list as usual.
+    """
+    values_serializer_class = None
+
+    def get_values_queryset(self):
+        """
+        Return the filtered list queryset as values() rows
+        :return: QuerySet of dicts
+        """
+        fields = self.get_serializer_context().get('fields')
+        return self.filter_queryset(self.get_queryset())\
+            .prefetch_related(None)\
+            .values(*self.values_serializer_class.get_values(fields))
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the rows through the values serializer
+        :param request:
+        :return: Response
+        """
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_values_queryset()
+        page = self.paginate_queryset(queryset)
+        serializer = self.values_serializer_class(
+            queryset if page is None else page,
+            context=self.get_serializer_context()
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+
+        return Response(serializer.data)
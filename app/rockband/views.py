@@ -1,22 +1,59 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, Min, OuterRef, Prefetch
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core.authentication import CachedTokenAuthentication
+from core.budget import query_budget
 from core.models import Tag, Member, Band
 
 from rockband import serializers
+from rockband.cache import CachedListMixin, bump_user_version
+from rockband.conditional import ConditionalBandMixin
+from rockband.export import band_rows, csv_lines, ndjson_lines, \
+    stream_lines
+from rockband.images import IMAGE_SIZES, available_formats, \
+    preferred_format, process_band_image
+from rockband.pagination import KeysetCursorPagination
+from rockband.sparse import SparseFieldsMixin
+from rockband.tasks import QueueFull, task_queue
+from rockband.values import ValuesListMixin
+
+logger = logging.getLogger(__name__)
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Pick the first renderer, leaving the Accept header to the view
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
 
 
-class BaseRockbandAttrViewSet(viewsets.GenericViewSet,
+class BaseRockbandAttrViewSet(CachedListMixin,
+                              ValuesListMixin,
+                              viewsets.GenericViewSet,
                               mixins.ListModelMixin,
                               mixins.CreateModelMixin):
     """
     Base viewset for user owned rockband attributes
     """
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    query_budgets = {'list': 2, 'create': 2}
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
@@ -38,11 +75,53 @@ class BaseRockbandAttrViewSet(viewsets.GenericViewSet,
         """
         serializer.save(user=self.request.user)
 
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    @query_budget(4)
+    def bulk(self, request):
+        """
+        Create objects for every given name the user does not have yet
+        :param request:
+        :return: mapping of every given name to its id
+        """
+        serializer = serializers.NameListSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        names = list(dict.fromkeys(serializer.validated_data['names']))
+        model = self.queryset.model
+        owned = model.objects.filter(user=request.user, name__in=names)
+        ids = {}
+        for name, pk in owned.order_by('id').values_list('name', 'id'):
+            ids.setdefault(name, pk)
+
+        new_names = [name for name in names if name not in ids]
+        created = model.objects.bulk_create([
+            model(user=request.user, name=name) for name in new_names
+        ])
+        if any(obj.pk is None for obj in created):
+            # Without pks from the insert, map every new name to its
+            # oldest row, the same pick as for the existing names
+            ids.update(owned.filter(name__in=new_names).order_by()
+                       .values_list('name').annotate(Min('id')))
+        else:
+            ids.update((obj.name, obj.pk) for obj in created)
+        if created:
+            bump_user_version(request.user.pk)
+
+        return Response(
+            {name: ids[name] for name in names},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
 
 class TagViewSet(BaseRockbandAttrViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    values_serializer_class = serializers.TagValuesSerializer
 
 
 class MemberViewSet(BaseRockbandAttrViewSet):
@@ -52,21 +131,83 @@ class MemberViewSet(BaseRockbandAttrViewSet):
 
     queryset = Member.objects.all()
     serializer_class = serializers.MemberSerializer
+    values_serializer_class = serializers.MemberValuesSerializer
 
 
-class BandViewSet(viewsets.ModelViewSet):
+class BandViewSet(ConditionalBandMixin, CachedListMixin, ValuesListMixin,
+                  SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Manage Bands in the database
     """
     serializer_class = serializers.BandSerializer
+    values_serializer_class = serializers.BandValuesSerializer
     queryset = Band.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetCursorPagination
+    export_chunk_size = 2000
+    bulk_max_items = 1000
+    match_modes = ('any', 'all')
+    export_formats = {
+        'ndjson': (ndjson_lines, 'application/x-ndjson'),
+        'csv': (csv_lines, 'text/csv'),
+    }
+    query_budgets = {
+        'list': 3,
+        'retrieve': 4,
+        'create': 14,
+        'update': 21,
+        'partial_update': 21,
+        'destroy': 5,
+    }
+
+    def _prefetch_plan(self):
+        """
+        Return the related lookups the current action's serializer reads,
+        leaving out relations missing from the requested fields
+        :return: tuple of prefetch lookups
+        """
+        fields = self.requested_fields() or serializers.BAND_RELATIONS
+        if self.action == 'retrieve':
+            return tuple(relation for relation in serializers.BAND_RELATIONS
+                         if relation in fields)
+        elif self.action in ('upload_image', 'image', 'export', 'destroy'):
+            return ()
+
+        return tuple(lookup for lookup in (
+            Prefetch('members',
+                     queryset=Member.objects.only('id').order_by('id')),
+            Prefetch('tags', queryset=Tag.objects.only('id').order_by('id')),
+        ) if lookup.prefetch_to in fields)
 
     def _params_to_ints(self, qs):
         """Convert a list of string IDs to a list of integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _filter_related(self, queryset, relation, ids, match):
+        """
+        Filter bands by related ids without joining the relation.
+        'any' keeps bands with at least one of the ids through an EXISTS
+        subquery, 'all' keeps bands linked to every id through a grouped
+        count on the through table.
+        :param queryset:
+        :param relation: 'members' or 'tags'
+        :param ids: list of related ids
+        :param match: 'any' or 'all'
+        :return: filtered queryset
+        """
+        descriptor = getattr(Band, relation)
+        target = f'{descriptor.field.m2m_reverse_field_name()}_id'
+        rows = descriptor.through.objects.filter(**{f'{target}__in': ids})
+        if match == 'all':
+            matching = rows.values('band_id')\
+                .annotate(matched=Count(target, distinct=True))\
+                .filter(matched=len(set(ids)))\
+                .values('band_id')
+            return queryset.filter(id__in=matching)
+
+        return queryset.filter(Exists(rows.filter(band_id=OuterRef('pk'))))
+
     def get_queryset(self):
         """
         Retrieve the receepies for the authenticated user
@@ -74,15 +215,32 @@ class BandViewSet(viewsets.ModelViewSet):
         """
         tags = self.request.query_params.get('tags')
         members = self.request.query_params.get('members')
+        match = self.request.query_params.get('match', 'any')
+        if match not in self.match_modes:
+            raise ValidationError(
+                {'match': [f'Must be one of: {", ".join(self.match_modes)}.']}
+            )
+
         queryset = self.queryset
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_related(queryset, 'tags', tag_ids, match)
         if members:
             members_ids = self._params_to_ints(members)
-            queryset = queryset.filter(members__id__in=members_ids)
+            queryset = self._filter_related(
+                queryset, 'members', members_ids, match
+            )
 
-        return queryset.filter(user=self.request.user)
+        queryset = queryset.filter(user=self.request.user)\
+            .prefetch_related(*self._prefetch_plan())\
+            .order_by('-id')
+        fields = self.requested_fields()
+        if fields:
+            queryset = queryset.only(
+                'modified', *serializers.band_columns(fields)
+            )
+
+        return queryset
 
     def get_serializer_class(self):
         """
@@ -93,6 +251,8 @@ class BandViewSet(viewsets.ModelViewSet):
             return serializers.BandDetailSerializer
         elif self.action == 'upload_image':
             return serializers.BandImageSerializer
+        elif self.action == 'bulk':
+            return serializers.BandBulkSerializer
 
         return self.serializer_class
 
@@ -105,10 +265,12 @@ class BandViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
     @action(methods=['POST'], detail=True, url_path='upload-image')
+    @query_budget(11)
     def upload_image(self, request, pk=None):
         """
-
-        Upload an image to a band
+        Upload an image to a band.
+        With BAND_IMAGE_ASYNC the variants are generated by the task
+        queue and 202 is returned, otherwise they are generated inline.
         :param request:
         :param pk:
         :return:
@@ -119,14 +281,142 @@ class BandViewSet(viewsets.ModelViewSet):
             data=request.data
         )
 
-        if serializer.is_valid():
-            serializer.save()
+        if not serializer.is_valid():
             return Response(
-                serializer.data,
-                status=status.HTTP_200_OK
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Saving in a transaction keeps the stored image name locked until
+        # the band references it, see ContentAddressedStorage
+        with transaction.atomic():
+            serializer.save(image_status=Band.IMAGE_PENDING,
+                            image_variants={})
+        if settings.BAND_IMAGE_ASYNC:
+            try:
+                task_queue().submit(process_band_image, band.id)
+                return Response(
+                    serializer.data,
+                    status=status.HTTP_202_ACCEPTED
+                )
+            except QueueFull:
+                logger.warning('Image queue full, processing band %s '
+                               'inline', band.id)
+
+        process_band_image(band.id)
+        band.refresh_from_db()
+        return Response(
+            self.get_serializer(band).data,
+            status=status.HTTP_200_OK
+        )
+
+    @action(methods=['GET'], detail=True, url_path='image',
+            content_negotiation_class=IgnoreClientContentNegotiation)
+    @query_budget(2)
+    def image(self, request, pk=None):
+        """
+        Redirect to the band image variant best suited to the client.
+        The size comes from ?size= and the format is negotiated on the
+        Accept header, preferring the most compact one allowed. Without a
+        variant for the size the original image is returned.
+        :param request:
+        :param pk:
+        :return:
+        """
+        size = request.query_params.get('size', 'medium')
+        if size not in IMAGE_SIZES:
+            return Response(
+                {'size': [f'Must be one of: {", ".join(IMAGE_SIZES)}.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        band = self.get_object()
+        if band.image_status != Band.IMAGE_READY:
+            return Response(
+                {'detail': 'The band image is not ready.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        variants = band.image_variants.get(size, {})
+        formats = [key for key in available_formats() if key in variants]
+        if formats:
+            key = preferred_format(request.META.get('HTTP_ACCEPT'), formats)
+            name = variants[key]
+        elif band.image:
+            name = band.image.name
+        else:
+            return Response(
+                {'detail': 'The band has no image.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        response = HttpResponseRedirect(
+            request.build_absolute_uri(band.image.storage.url(name))
+        )
+        patch_vary_headers(response, ('Accept',))
+
+        return response
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    @query_budget(4)
+    def export(self, request):
+        """
+        Stream every band of the user as NDJSON or CSV
+        :param request:
+        :return:
+        """
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in self.export_formats:
+            return Response(
+                {'export_format': [
+                    f'Must be one of: {", ".join(self.export_formats)}.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines, content_type = self.export_formats[export_format]
+        rows = band_rows(self.get_queryset(), self.export_chunk_size)
+        response = StreamingHttpResponse(stream_lines(lines, rows),
+                                         content_type=content_type)
+        response['Content-Disposition'] = \
+            f'attachment; filename="bands.{export_format}"'
+
+        return response
+
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    @query_budget(14)
+    def bulk(self, request):
+        """
+        Create or update a batch of bands in one request
+        :param request:
+        :return:
+        """
+        if isinstance(request.data, list) and \
+                len(request.data) > self.bulk_max_items:
+            return Response(
+                {'non_field_errors': [
+                    f'Ensure this list has no more than '
+                    f'{self.bulk_max_items} items.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        bands = serializer.save(user=request.user)
+        bump_user_version(request.user.pk)
+        saved = Band.objects.prefetch_related(*self._prefetch_plan())\
+            .in_bulk([band.id for band in bands])
+
         return Response(
-            serializer.errors,
-            status=status.HTTP_400_BAD_REQUEST
+            serializers.BandSerializer(
+                [saved[band.id] for band in bands],
+                many=True,
+                context=self.get_serializer_context()
+            ).data,
+            status=status.HTTP_201_CREATED
         )
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.tests import scaling
+
+PASSWORD = 'testpass'
+
+
+class UserQueryScalingTests(scaling.QueryScalingTestCase):
+    """
+    Test every user route keeps a flat query count
+    """
+    urlconf = 'user.urls'
+    namespace = 'user'
+    scenarios = (
+        ('user:create', 'POST', 'create_user'),
+        ('user:token', 'POST', 'create_token'),
+        ('user:token', 'POST', 'create_first_token'),
+        ('user:me', 'GET', 'me'),
+        ('user:me', 'PUT', 'update_me'),
+        ('user:me', 'PATCH', 'partial_update_me'),
+        ('user:me', 'PATCH', 'partial_update_me_password'),
+    )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.password = make_password(PASSWORD)
+
+    def reset(self):
+        get_user_model().objects.all().delete()
+
+    def seed(self, size):
+        """
+        Create size users and authenticate the client as the last one
+        :param size:
+        :return: user
+        """
+        get_user_model().objects.bulk_create([
+            get_user_model()(email=f'user{i}@rockbanddev.com',
+                             password=self.password, name=f'User {i}')
+            for i in range(size)
+        ])
+        user = get_user_model().objects.get(
+            email=f'user{size - 1}@rockbanddev.com'
+        )
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return user
+
+    def create_user(self, size):
+        self.seed(size)
+        self.client.credentials()
+        return {'path': reverse('user:create'),
+                'data': {'email': 'new@rockbanddev.com',
+                         'password': PASSWORD, 'name': 'New'}}
+
+    def create_token(self, size):
+        user = self.seed(size)
+        self.client.credentials()
+        return {'path': reverse('user:token'),
+                'data': {'email': user.email, 'password': PASSWORD}}
+
+    def create_first_token(self, size):
+        user = self.seed(size)
+        Token.objects.filter(user=user).delete()
+        self.client.credentials()
+        return {'path': reverse('user:token'),
+                'data': {'email': user.email, 'password': PASSWORD}}
+
+    def me(self, size):
+        self.seed(size)
+        return {'path': reverse('user:me')}
+
+    def update_me(self, size):
+        self.seed(size)
+        return {'path': reverse('user:me'),
+                'data': {'email': 'renamed@rockbanddev.com',
+                         'password': 'newpass', 'name': 'Renamed'}}
+
+    def partial_update_me(self, size):
+        self.seed(size)
+        return {'path': reverse('user:me'), 'data': {'name': 'Renamed'}}
+
+    def partial_update_me_password(self, size):
+        self.seed(size)
+        return {'path': reverse('user:me'),
+                'data': {'name': 'Renamed', 'password': 'newpass'}}